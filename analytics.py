@@ -0,0 +1,269 @@
+"""
+Appointment analytics rollups.
+
+`appointment_rollup` holds per-doctor, per-day counts of scheduled, completed
+and cancelled appointments. A session `after_flush` listener applies +1/-1
+deltas to it whenever an appointment is booked, cancelled, completed,
+rescheduled or deleted, in the same transaction as the change.
+`backfill_rollups` rebuilds it from the full Appointment table (vectorized
+with NumPy when it is installed). The admin analytics page and JSON endpoint
+only ever read the rollup table.
+
+Both paths credit rollup rows to the doctor's current department: moving a
+doctor to another department re-keys all of their rollup rows.
+"""
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, inspect, select, update, insert, delete, func
+from extensions import db
+from models import Doctor, Department, Appointment, AppointmentRollup, DoctorDirectory
+from collections import Counter
+import datetime
+
+try:
+    import numpy as np
+except ImportError:  # Without NumPy, backfills fall back to pure Python
+    np = None
+
+STATUS_COLUMNS = {'Completed': 'completed', 'Cancelled': 'cancelled'}
+
+
+# --- INCREMENTAL MAINTENANCE ---
+
+def _attr_values(state, name):
+    """(old, new) values of an attribute in the current flush."""
+    history = state.attrs[name].history
+    new = history.added[0] if history.added else (history.unchanged[0] if history.unchanged else None)
+    old = history.deleted[0] if history.deleted else new
+    return old, new
+
+
+def _appointment_deltas(obj, action):
+    """Yield ((day, doctor_id), {column: delta}) for one flushed appointment."""
+    state = inspect(obj)
+    day_old, day_new = _attr_values(state, 'appointment_date')
+    doc_old, doc_new = _attr_values(state, 'doctor_id')
+    status_old, status_new = _attr_values(state, 'status')
+
+    if action == 'create':
+        before, after = None, (day_new, doc_new, status_new or 'Booked')
+    elif action == 'delete':
+        before, after = (day_old, doc_old, status_old), None
+    else:
+        before, after = (day_old, doc_old, status_old), (day_new, doc_new, status_new)
+        if before == after:
+            return
+
+    for values, sign in ((before, -1), (after, 1)):
+        if values is None:
+            continue
+        day, doctor_id, status = values
+        delta = {'total': sign}
+        if status in STATUS_COLUMNS:
+            delta[STATUS_COLUMNS[status]] = sign
+        yield (day, doctor_id), delta
+
+
+def apply_rollup_deltas(connection, deltas):
+    """Add the given per-(day, doctor) deltas to the rollup table."""
+    if not deltas:
+        return
+    rollup = AppointmentRollup.__table__
+    departments = dict(connection.execute(
+        select(Doctor.id, Doctor.department_id).where(Doctor.id.in_({doc for _, doc in deltas}))
+    ).all())
+
+    for (day, doctor_id), delta in deltas.items():
+        if not any(delta.values()):
+            continue
+        result = connection.execute(
+            update(rollup)
+            .where(rollup.c.day == day, rollup.c.doctor_id == doctor_id)
+            .values({**{column: rollup.c[column] + amount for column, amount in delta.items()},
+                     'department_id': departments.get(doctor_id, rollup.c.department_id)})
+        )
+        if delta.get('total', 0) < 0:
+            # Drop rows that no longer count any appointment (moved or deleted)
+            connection.execute(delete(rollup).where(
+                rollup.c.day == day, rollup.c.doctor_id == doctor_id, rollup.c.total <= 0
+            ))
+        elif result.rowcount == 0 and doctor_id in departments:
+            connection.execute(insert(rollup).values(
+                day=day, doctor_id=doctor_id, department_id=departments[doctor_id],
+                total=delta.get('total', 0), completed=delta.get('completed', 0),
+                cancelled=delta.get('cancelled', 0),
+            ))
+
+
+def move_doctor_rollups(connection, doctor_ids):
+    """Re-key the rollup rows of the given doctors to their current department."""
+    if not doctor_ids:
+        return
+    rollup = AppointmentRollup.__table__
+    connection.execute(
+        update(rollup)
+        .where(rollup.c.doctor_id.in_(doctor_ids))
+        .values(department_id=select(Doctor.department_id).where(Doctor.id == rollup.c.doctor_id)
+                .scalar_subquery())
+    )
+
+
+def _keep_previous_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Load the old value when these are set on an expired instance, so the flush
+# history knows which rollup row to decrement.
+for _attribute in (Appointment.appointment_date, Appointment.doctor_id, Appointment.status):
+    event.listen(_attribute, 'set', _keep_previous_value, active_history=True, retval=True)
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_rollups_after_flush(session, flush_context):
+    deltas, moved_doctors = {}, set()
+    for objects, action in ((session.new, 'create'), (session.dirty, 'update'), (session.deleted, 'delete')):
+        for obj in objects:
+            if isinstance(obj, Doctor) and action == 'update':
+                state = inspect(obj)
+                if state.attrs.department_id.history.has_changes() or state.attrs.department.history.has_changes():
+                    moved_doctors.add(obj.id)
+            elif isinstance(obj, Appointment):
+                for key, delta in _appointment_deltas(obj, action):
+                    totals = deltas.setdefault(key, {})
+                    for column, amount in delta.items():
+                        totals[column] = totals.get(column, 0) + amount
+    apply_rollup_deltas(session.connection(), deltas)
+    move_doctor_rollups(session.connection(), moved_doctors)
+
+
+# --- BACKFILL ---
+
+def _aggregate_numpy(chunks):
+    partials = []
+    for rows in chunks:
+        if not rows:
+            continue
+        dates, doctor_ids, status_values = zip(*rows)
+        days = np.fromiter((d.toordinal() for d in dates), dtype=np.int64, count=len(rows))
+        doctors = np.array(doctor_ids, dtype=np.int64)
+        statuses = np.array(status_values)
+        # Pack (day, doctor) into one int64 key: doctor ids stay well below 2**32
+        keys = (days << 32) | doctors
+        unique, inverse = np.unique(keys, return_inverse=True)
+        partials.append((
+            unique,
+            np.bincount(inverse, minlength=len(unique)),
+            np.bincount(inverse, weights=(statuses == 'Completed'), minlength=len(unique)),
+            np.bincount(inverse, weights=(statuses == 'Cancelled'), minlength=len(unique)),
+        ))
+    if not partials:
+        return []
+
+    keys = np.concatenate([p[0] for p in partials])
+    unique, inverse = np.unique(keys, return_inverse=True)
+    sums = [np.bincount(inverse, weights=np.concatenate([p[i] for p in partials]), minlength=len(unique))
+            for i in (1, 2, 3)]
+    return [
+        (datetime.date.fromordinal(int(key >> 32)), int(key & 0xFFFFFFFF),
+         int(total), int(completed), int(cancelled))
+        for key, total, completed, cancelled in zip(unique.tolist(), *(x.tolist() for x in sums))
+    ]
+
+
+def _aggregate_python(chunks):
+    counts = Counter()
+    for rows in chunks:
+        for day, doctor_id, status in rows:
+            counts[(day, doctor_id, 'total')] += 1
+            if status in STATUS_COLUMNS:
+                counts[(day, doctor_id, STATUS_COLUMNS[status])] += 1
+    keys = sorted({(day, doctor_id) for day, doctor_id, _ in counts})
+    return [(day, doctor_id, counts[(day, doctor_id, 'total')], counts[(day, doctor_id, 'completed')],
+             counts[(day, doctor_id, 'cancelled')]) for day, doctor_id in keys]
+
+
+def backfill_rollups(chunk_size=100_000):
+    """Rebuild the rollup table from every appointment. Returns the number of rollup rows."""
+    connection = db.session.connection()
+    departments = dict(connection.execute(select(Doctor.id, Doctor.department_id)).all())
+
+    result = connection.execution_options(yield_per=chunk_size).execute(
+        select(Appointment.appointment_date, Appointment.doctor_id, Appointment.status)
+    )
+    aggregate = _aggregate_numpy if np is not None else _aggregate_python
+    rows = [
+        {'day': day, 'doctor_id': doctor_id, 'department_id': departments[doctor_id],
+         'total': total, 'completed': completed, 'cancelled': cancelled}
+        for day, doctor_id, total, completed, cancelled in aggregate(result.partitions())
+        if doctor_id in departments
+    ]
+
+    rollup = AppointmentRollup.__table__
+    connection.execute(delete(rollup))
+    for start in range(0, len(rows), 10_000):
+        connection.execute(insert(rollup), rows[start:start + 10_000])
+    db.session.commit()
+    return len(rows)
+
+
+# --- REPORTING ---
+
+def _period_start(day, period):
+    if period == 'week':
+        return day - datetime.timedelta(days=day.weekday())
+    return day
+
+
+def _days_in_period(period_start, period, start, end):
+    period_end = period_start + datetime.timedelta(days=6 if period == 'week' else 0)
+    return (min(period_end, end) - max(period_start, start)).days + 1
+
+
+def utilization_report(start, end, group_by='department', period='day', slots_per_day=16):
+    """
+    Appointment volume, completion/cancellation rates and utilization per
+    department or doctor, bucketed by day or week. Reads only the rollups.
+    Utilization is non-cancelled appointments over the slots the group's
+    doctors had in the period.
+    """
+    rollup = AppointmentRollup
+    key_column = rollup.department_id if group_by == 'department' else rollup.doctor_id
+    grouped = db.session.execute(
+        select(rollup.day, key_column, func.sum(rollup.total), func.sum(rollup.completed), func.sum(rollup.cancelled))
+        .where(rollup.day >= start, rollup.day <= end)
+        .group_by(rollup.day, key_column)
+    ).all()
+
+    if group_by == 'department':
+        names = dict(db.session.execute(select(Department.id, Department.name)).all())
+        doctor_counts = dict(db.session.execute(
+            select(DoctorDirectory.department_id, func.count())
+            .where(DoctorDirectory.is_active == True)
+            .group_by(DoctorDirectory.department_id)
+        ).all())
+    else:
+        names = dict(db.session.execute(select(DoctorDirectory.doctor_id, DoctorDirectory.name)).all())
+        doctor_counts = {}
+
+    buckets = {}
+    for day, key, total, completed, cancelled in grouped:
+        bucket = buckets.setdefault((_period_start(day, period), key), [0, 0, 0])
+        bucket[0] += total
+        bucket[1] += completed
+        bucket[2] += cancelled
+
+    report = []
+    for (period_start, key), (total, completed, cancelled) in sorted(buckets.items()):
+        doctors = doctor_counts.get(key, 1) if group_by == 'department' else 1
+        capacity = max(doctors, 1) * slots_per_day * _days_in_period(period_start, period, start, end)
+        report.append({
+            'period': period_start.isoformat(),
+            'id': key,
+            'name': names.get(key, f'#{key}'),
+            'total': total,
+            'completed': completed,
+            'cancelled': cancelled,
+            'completion_rate': round(completed / total, 3) if total else 0.0,
+            'cancellation_rate': round(cancelled / total, 3) if total else 0.0,
+            'utilization': round((total - cancelled) / capacity, 3),
+        })
+    return report
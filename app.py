@@ -1,15 +1,32 @@
-from flask import Flask, render_template, redirect, url_for, flash, request, jsonify
+from flask import Flask, render_template, stream_template, Response, redirect, url_for, flash, request, jsonify, get_flashed_messages
 from functools import wraps
+from markupsafe import Markup, escape
 from extensions import db, login_manager
-from models import User, Doctor, Patient, Appointment, Treatment, Department, load_user
-from flask_wtf.csrf import CSRFProtect
+from models import (User, Doctor, Patient, Appointment, Treatment, Department, DoctorDirectory, AuditLog,
+                    PatientSummary, load_user)
+from directory import rebuild_directory
+from tenancy import init_tenancy, use_tenant
+from audit import init_audit
+from assets import init_assets, build_assets
+from compression import GzipMiddleware
+from analytics import backfill_rollups, utilization_report
+from backup import init_backups, backup_database, restore_backup, database_path, snapshot_dir
+from sync import changes_since, backfill_change_seqs
+from migrations import upgrade_schema, migrate_treatment_text, fill_empty_read_models
+from typeahead import init_typeahead, current_index
+from history import rebuild_summaries
+from flask_wtf.csrf import CSRFProtect, generate_csrf
 from flask_login import login_user, logout_user, login_required, current_user
 import os
 from dotenv import load_dotenv
 import json
+import sqlite3
 from datetime import date
 import datetime 
-from sqlalchemy import or_
+from sqlalchemy import or_, event, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import contains_eager, joinedload, undefer_group
+import click
 
 load_dotenv()
 
@@ -20,6 +37,63 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(basedir, 'hospital.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# --- TENANCY CONFIGURATION ---
+# Comma-separated list of hospitals served by this deployment; empty = single hospital
+app.config['TENANTS'] = {t.strip().lower() for t in os.getenv('TENANTS', '').split(',') if t.strip()}
+app.config['TENANT_HEADER'] = 'X-Tenant'
+app.config['TENANT_BASE_DOMAIN'] = os.getenv('TENANT_BASE_DOMAIN')
+app.config['TENANT_DATABASE_URI_TEMPLATE'] = os.getenv(
+    'TENANT_DATABASE_URI_TEMPLATE', 'sqlite:///' + os.path.join(basedir, 'tenants', '{tenant}.db'))
+app.config['TENANT_MAX_ENGINES'] = int(os.getenv('TENANT_MAX_ENGINES', 32))
+app.config['TENANT_IDLE_TIMEOUT'] = int(os.getenv('TENANT_IDLE_TIMEOUT', 600))
+
+# --- AUDIT CONFIGURATION ---
+app.config['AUDIT_BATCH_SIZE'] = int(os.getenv('AUDIT_BATCH_SIZE', 100))
+app.config['AUDIT_FLUSH_INTERVAL'] = float(os.getenv('AUDIT_FLUSH_INTERVAL', 5))
+# Failed batches are retried with backoff (doubling from AUDIT_RETRY_BACKOFF
+# seconds), then spilled to NDJSON files in AUDIT_SPILL_DIR
+app.config['AUDIT_MAX_RETRIES'] = int(os.getenv('AUDIT_MAX_RETRIES', 5))
+app.config['AUDIT_RETRY_BACKOFF'] = float(os.getenv('AUDIT_RETRY_BACKOFF', 1))
+app.config['AUDIT_SPILL_DIR'] = os.getenv('AUDIT_SPILL_DIR', os.path.join(basedir, 'audit_spill'))
+
+# --- COMPRESSION CONFIGURATION ---
+app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+app.config['COMPRESS_LEVEL'] = int(os.getenv('COMPRESS_LEVEL', 6))
+
+# --- STREAMING CONFIGURATION ---
+# Rows fetched per query by streamed list pages; the connection is released between batches
+app.config['STREAM_BATCH_SIZE'] = int(os.getenv('STREAM_BATCH_SIZE', 200))
+
+# --- ANALYTICS CONFIGURATION ---
+# Bookable slots per doctor per day, used as the denominator for utilization
+app.config['ANALYTICS_SLOTS_PER_DAY'] = int(os.getenv('ANALYTICS_SLOTS_PER_DAY', 16))
+
+# --- TYPEAHEAD CONFIGURATION ---
+# How often (seconds) each worker checks for doctor changes made by other workers
+app.config['TYPEAHEAD_REFRESH_INTERVAL'] = float(os.getenv('TYPEAHEAD_REFRESH_INTERVAL', 2))
+app.config['TYPEAHEAD_MAX_RESULTS'] = int(os.getenv('TYPEAHEAD_MAX_RESULTS', 10))
+
+# --- PATIENT HISTORY CONFIGURATION ---
+app.config['HISTORY_PAGE_SIZE'] = int(os.getenv('HISTORY_PAGE_SIZE', 20))
+# Prescriptions from visits within this many days are shown as active
+app.config['HISTORY_ACTIVE_PRESCRIPTION_DAYS'] = int(os.getenv('HISTORY_ACTIVE_PRESCRIPTION_DAYS', 90))
+
+# --- SQLITE CONFIGURATION ---
+# WAL lets readers (including online backups) run alongside writers
+app.config['SQLITE_WAL'] = os.getenv('SQLITE_WAL', '1') == '1'
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if app.config['SQLITE_WAL'] and isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.execute('PRAGMA journal_mode=WAL')
+
+# --- BACKUP CONFIGURATION ---
+app.config['BACKUP_DIR'] = os.getenv('BACKUP_DIR', os.path.join(basedir, 'backups'))
+app.config['BACKUP_KEEP'] = int(os.getenv('BACKUP_KEEP', 7))
+app.config['BACKUP_INTERVAL'] = int(os.getenv('BACKUP_INTERVAL', 0))  # seconds; 0 = no scheduled backups
+app.config['BACKUP_PAGES_PER_STEP'] = int(os.getenv('BACKUP_PAGES_PER_STEP', 1024))
+app.config['BACKUP_STEP_SLEEP'] = float(os.getenv('BACKUP_STEP_SLEEP', 0.005))
+
 # --- INITIALIZE EXTENSIONS ---
 db.init_app(app)
 login_manager.init_app(app)
@@ -27,6 +101,15 @@ login_manager.user_loader(load_user)
 login_manager.login_view = 'login'
 login_manager.login_message_category = 'info'
 csrf = CSRFProtect(app)
+init_tenancy(app)
+init_audit(app)
+init_assets(app)
+init_typeahead(app)
+init_backups(app, lambda: [(None, db.engine)] + [(t, app.extensions['tenancy'].get_engine(t))
+                                                 for t in sorted(app.config['TENANTS'])])
+app.wsgi_app = GzipMiddleware(app.wsgi_app,
+                              min_size=app.config['COMPRESS_MIN_SIZE'],
+                              level=app.config['COMPRESS_LEVEL'])
 
 # --- IMPORT FORMS (AFTER CONFIG) ---
 from forms import (
@@ -65,12 +148,47 @@ def doctor_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# --- STREAMED RENDERING ---
+def stream_page(template_name, **context):
+    """Render a large page as a streamed response so the first bytes go out immediately."""
+    # The session cookie is sent with the headers, so anything the templates would
+    # write to the session (flashes, the CSRF token) has to happen before streaming.
+    get_flashed_messages(with_categories=True)
+    generate_csrf()
+    return Response(stream_template(template_name, **context))
+
+def iter_in_batches(query, keys, batch_size=200):
+    """
+    Iterate over `query` in keyset batches ordered by `keys` (unique together),
+    for streamed pages. The session is closed after each batch, so no pooled
+    connection or WAL read snapshot is held while a slow client downloads the
+    rows; the rows come out detached, so anything the template touches must be
+    loaded eagerly.
+    """
+    last = None
+    while True:
+        batch_query = query if last is None else query.filter(tuple_(*keys) > last)
+        rows = batch_query.add_columns(*keys).order_by(*keys).limit(batch_size).all()
+        db.session.close()
+        for row in rows:
+            yield row[0]
+        if len(rows) < batch_size:
+            return
+        last = tuple(rows[-1][1:])
+
 # --- INJECT CONTEXT ---
 @app.context_processor
 def inject_current_year():
     """Injects the current year into all templates."""
     return {'current_year': datetime.date.today().year}
 
+@app.template_filter('nl2br')
+def nl2br(value):
+    """Escape text and turn its line breaks into <br> tags."""
+    if not value:
+        return ''
+    return Markup('<br>\n').join(escape(value).splitlines())
+
 # --- AUTHENTICATION ROUTES ---
 @app.route('/register', methods=['GET', 'POST'])
 def register():
@@ -157,19 +275,19 @@ def admin_manage_doctors():
     """READ: Display all doctor profiles, with search."""
     q = request.args.get('q') 
     
+    # Single-table read from the denormalized directory
+    query = DoctorDirectory.query
+
     if q:
         # If there is a search, filter by name OR department name
-        query = Doctor.query.join(User).join(Department).filter(
+        query = query.filter(
             or_(
-                User.name.ilike(f'%{q}%'),
-                Department.name.ilike(f'%{q}%')
+                DoctorDirectory.name.ilike(f'%{q}%'),
+                DoctorDirectory.department_name.ilike(f'%{q}%')
             )
         )
-    else:
-
-        query = Doctor.query
         
-    doctors = query.all()
+    doctors = query.order_by(DoctorDirectory.name).all()
     
     #Path is used by admin/subfolder
     return render_template('admin/manage_doctors.html',
@@ -250,26 +368,82 @@ def admin_manage_patients():
     """READ: Display all patient profiles, with search."""
     q = request.args.get('q')
     
+    # Load each patient's user in the same query instead of one query per row
+    query = Patient.query.join(User).options(contains_eager(Patient.user))
+
     if q:
         # search patients by name, email, or contact phone
-        query = Patient.query.join(User).filter(
+        query = query.filter(
             or_(
                 User.name.ilike(f'%{q}%'),
                 User.email.ilike(f'%{q}%'),
                 Patient.contact_phone.ilike(f'%{q}%')
             )
         )
-    else:
-        query = Patient.query
         
-    patients = query.all()
+    # Rows are fetched in bounded batches as the streamed template iterates over them
+    patients = iter_in_batches(query, (User.name, Patient.id), app.config['STREAM_BATCH_SIZE'])
     
     # Path uses admin/ subfolder
-    return render_template('admin/manage_patients.html',
+    return stream_page('admin/manage_patients.html',
                            title='Manage Patients',
                            patients=patients,
                            search_query=q)
 
+@app.route('/admin/audit_log')
+@admin_required
+def admin_audit_log():
+    """READ: Browse the audit log, newest first, filtered by table and/or actor."""
+    table = request.args.get('table')
+    actor = request.args.get('actor')
+    page = request.args.get('page', 1, type=int)
+
+    # Make sure entries still waiting in the write-behind buffer are visible
+    app.extensions['audit'].flush()
+
+    query = AuditLog.query
+    if table:
+        query = query.filter(AuditLog.table_name == table)
+    if actor:
+        query = query.filter(AuditLog.actor_email.ilike(f'%{actor}%'))
+
+    entries = query.order_by(AuditLog.id.desc()).paginate(page=page, per_page=50, error_out=False)
+
+    # Path uses admin/ subfolder
+    return render_template('admin/audit_log.html',
+                           title='Audit Log',
+                           entries=entries,
+                           tables=['appointment', 'user', 'doctor', 'treatment'],
+                           table=table, actor=actor)
+
+def _analytics_params():
+    """Read and validate the analytics filters from the query string."""
+    today = date.today()
+    try:
+        end = date.fromisoformat(request.args.get('end', today.isoformat()))
+        start = date.fromisoformat(request.args.get('start', (end - datetime.timedelta(days=29)).isoformat()))
+    except ValueError:
+        end, start = today, today - datetime.timedelta(days=29)
+    if start > end:
+        start, end = end, start
+    group_by = request.args.get('group_by', 'department')
+    if group_by not in ('department', 'doctor'):
+        group_by = 'department'
+    period = request.args.get('period', 'day')
+    if period not in ('day', 'week'):
+        period = 'day'
+    return start, end, group_by, period
+
+@app.route('/admin/analytics')
+@admin_required
+def admin_analytics():
+    """READ: Appointment volume, completion/cancellation rates and utilization (from rollups)."""
+    start, end, group_by, period = _analytics_params()
+    report = utilization_report(start, end, group_by, period, app.config['ANALYTICS_SLOTS_PER_DAY'])
+    # Path uses admin/ subfolder
+    return render_template('admin/analytics.html', title='Analytics', report=report,
+                           start=start, end=end, group_by=group_by, period=period)
+
 # --- DOCTOR ROUTES ---
 @app.route('/doctor/dashboard')
 @doctor_required
@@ -279,18 +453,22 @@ def doctor_dashboard():
         flash('Could not find your doctor profile.', 'danger')
         return redirect(url_for('logout'))
     today = date.today()
+    # Everything the template touches is loaded up front, one query per list
+    # instead of one per row; the page is then streamed from these results.
+    with_patient = contains_eager(Appointment.patient).contains_eager(Patient.user)
     todays_appts = Appointment.query.filter(
         Appointment.doctor_id == doctor.id, Appointment.appointment_date == today, Appointment.status == 'Booked'
-    ).join(Patient).join(User).order_by(Appointment.appointment_time).all()
+    ).join(Patient).join(User).options(with_patient).order_by(Appointment.appointment_time).all()
     upcoming_appts = Appointment.query.filter(
         Appointment.doctor_id == doctor.id, Appointment.appointment_date > today, Appointment.status == 'Booked'
-    ).join(Patient).join(User).order_by(Appointment.appointment_date, Appointment.appointment_time).all()
+    ).join(Patient).join(User).options(with_patient).order_by(Appointment.appointment_date, Appointment.appointment_time).all()
     completed_appts = Appointment.query.filter(
         Appointment.doctor_id == doctor.id, Appointment.status == 'Completed'
-    ).join(Patient).join(User).order_by(Appointment.appointment_date.desc()).all()
+    ).join(Patient).join(User).options(with_patient, joinedload(Appointment.treatment))\
+     .order_by(Appointment.appointment_date.desc()).all()
     form = TreatmentForm()
     # Path uses doctor/ subfolder
-    return render_template('doctor/dashboard.html', title='Doctor Dashboard',
+    return stream_page('doctor/dashboard.html', title='Doctor Dashboard',
                            todays_appts=todays_appts, upcoming_appts=upcoming_appts,
                            completed_appts=completed_appts, form=form)
 
@@ -334,13 +512,33 @@ def cancel_appointment(appointment_id):
 @doctor_required
 def doctor_patient_history(patient_id):
     patient = Patient.query.get_or_404(patient_id)
-    completed_appts = Appointment.query.filter_by(
+    summary = db.session.get(PatientSummary, patient.id)
+    page = request.args.get('page', 1, type=int)
+
+    # One page of the timeline; full treatment text (deferred) is fetched per visit on demand
+    timeline = Appointment.query.filter_by(
         patient_id=patient.id, status='Completed'
-    ).join(Treatment).order_by(Appointment.appointment_date.desc()).all()
+    ).join(Treatment).options(
+        contains_eager(Appointment.treatment),
+        joinedload(Appointment.doctor).joinedload(Doctor.user)
+    ).order_by(
+        Appointment.appointment_date.desc(), Appointment.appointment_time.desc(), Appointment.id.desc()
+    ).paginate(page=page, per_page=app.config['HISTORY_PAGE_SIZE'], error_out=False)
+
     # Path uses doctor/ subfolder
     return render_template('doctor/patient_history.html',
                            title=f"History for {patient.user.name}",
-                           patient=patient, appointments=completed_appts)
+                           patient=patient, summary=summary, appointments=timeline,
+                           active_prescriptions=summary.active_prescriptions(
+                               app.config['HISTORY_ACTIVE_PRESCRIPTION_DAYS']) if summary else [])
+
+@app.route('/doctor/treatment/<int:appointment_id>')
+@doctor_required
+def doctor_treatment_detail(appointment_id):
+    """Full treatment text for one visit, loaded when its timeline entry is expanded."""
+    treatment = Treatment.query.filter_by(appointment_id=appointment_id)\
+                               .options(undefer_group('text')).first_or_404()
+    return render_template('doctor/treatment_detail.html', treatment=treatment)
 
 @app.route('/doctor/availability', methods=['GET', 'POST'])
 @doctor_required
@@ -411,23 +609,23 @@ def patient_view_doctors():
     dept_id = request.args.get('dept_id', type=int)
     q = request.args.get('q')
     
-    # Start with active doctors
-    query = Doctor.query.join(User).filter(User.is_active == True)
+    # Start with active doctors (single-table read from the directory)
+    query = DoctorDirectory.query.filter(DoctorDirectory.is_active == True)
     
     if dept_id:
         # Filter by department
-        query = query.filter(Doctor.department_id == dept_id)
+        query = query.filter(DoctorDirectory.department_id == dept_id)
     
     if q:
         # Filter by search query (name or department)
-        query = query.join(Department).filter(
+        query = query.filter(
             or_(
-                User.name.ilike(f'%{q}%'),
-                Department.name.ilike(f'%{q}%')
+                DoctorDirectory.name.ilike(f'%{q}%'),
+                DoctorDirectory.department_name.ilike(f'%{q}%')
             )
         )
         
-    doctors = query.all()
+    doctors = query.order_by(DoctorDirectory.name).all()
     
     # Path uses patient/ subfolder
     return render_template('patient/view_doctors.html',
@@ -489,14 +687,15 @@ def api_doctors():
     
     # --- METHOD 1: GET (Read All) ---
     if request.method == 'GET':
-        doctors = Doctor.query.join(User).filter(User.is_active == True).all()
+        doctors = DoctorDirectory.query.filter(DoctorDirectory.is_active == True)\
+                                       .order_by(DoctorDirectory.name).all()
         doctor_list = []
         for doc in doctors:
             doctor_list.append({
-                'id': doc.id,
-                'name': doc.user.name,
-                'email': doc.user.email,
-                'department': doc.department.name
+                'id': doc.doctor_id,
+                'name': doc.name,
+                'email': doc.email,
+                'department': doc.department_name
             })
         return jsonify(doctors=doctor_list)
 
@@ -546,6 +745,48 @@ def api_doctors():
             return jsonify(error=f'Database error: {str(e)}'), 500
 
 
+@app.route('/api/analytics', methods=['GET'])
+@login_required
+def api_analytics():
+    if current_user.role != 'admin':
+        return jsonify(error='Forbidden. Admin access required.'), 403
+    start, end, group_by, period = _analytics_params()
+    report = utilization_report(start, end, group_by, period, app.config['ANALYTICS_SLOTS_PER_DAY'])
+    return jsonify(start=start.isoformat(), end=end.isoformat(),
+                   group_by=group_by, period=period, rows=report)
+
+
+@app.route('/api/typeahead', methods=['GET'])
+@login_required
+def api_typeahead():
+    q = request.args.get('q', '')
+    limit = min(request.args.get('limit', 8, type=int), app.config['TYPEAHEAD_MAX_RESULTS'])
+    results = []
+    for item in current_index().search(q, max(limit, 1)):
+        if item['type'] == 'doctor':
+            url = url_for('book_appointment', doctor_id=item['id'])
+        else:
+            url = url_for('patient_view_doctors', dept_id=item['id'])
+        results.append({**item, 'url': url})
+    return jsonify(query=q, results=results)
+
+
+@app.route('/api/sync', methods=['GET'])
+@login_required
+def api_sync():
+    # Token from the previous sync's 'next'; omit it (or pass 0) for a full sync
+    try:
+        since = int(request.args.get('since', 0))
+        limit = min(max(int(request.args.get('limit', 500)), 1), 1000)
+    except ValueError:
+        return jsonify(error='since and limit must be integers.'), 400
+    if since < 0:
+        return jsonify(error='Invalid sync token.'), 400
+
+    changes, next_token, has_more = changes_since(since, limit, current_user)
+    return jsonify(changes=changes, next=next_token, has_more=has_more)
+
+
 @app.route('/api/doctors/<int:doctor_id>', methods=['GET', 'PUT', 'DELETE'])
 @login_required # Require ALL API access to be by a logged-in user
 def api_single_doctor(doctor_id):
@@ -603,6 +844,91 @@ def api_single_doctor(doctor_id):
         
         return '', 204
         
+# --- CLI COMMANDS ---
+
+@app.cli.command('rebuild-directory')
+@click.option('--tenant', default=None, help='Hospital to run against (default database if omitted).')
+def rebuild_directory_command(tenant):
+    """Rebuild the doctor_directory read table from the source tables."""
+    with use_tenant(tenant):
+        count = rebuild_directory()
+    print(f'Doctor directory rebuilt with {count} entries.')
+
+@app.cli.command('backfill-analytics')
+@click.option('--tenant', default=None, help='Hospital to run against (default database if omitted).')
+def backfill_analytics_command(tenant):
+    """Rebuild the appointment_rollup table from the full appointment history."""
+    with use_tenant(tenant):
+        count = backfill_rollups()
+    print(f'Analytics rollups rebuilt with {count} rows.')
+
+@app.cli.command('rebuild-summaries')
+@click.option('--tenant', default=None, help='Hospital to run against (default database if omitted).')
+def rebuild_summaries_command(tenant):
+    """Rebuild the patient_summary read table from the full treatment history."""
+    with use_tenant(tenant):
+        count = rebuild_summaries()
+    print(f'Patient summaries rebuilt for {count} patients.')
+
+@app.cli.command('backup')
+@click.option('--tenant', default=None, help='Hospital to run against (default database if omitted).')
+@click.option('--dest', default=None, help='Directory for snapshots (defaults to BACKUP_DIR, or BACKUP_DIR/tenants/<tenant>).')
+@click.option('--keep', default=None, type=int, help='Number of snapshots to keep (defaults to BACKUP_KEEP).')
+def backup_command(tenant, dest, keep):
+    """Take a compressed, checksummed online snapshot of the database."""
+    with use_tenant(tenant):
+        db_path = database_path(db.session.get_bind())
+    snapshot = backup_database(db_path, dest or snapshot_dir(app.config['BACKUP_DIR'], tenant),
+                               keep=app.config['BACKUP_KEEP'] if keep is None else keep,
+                               pages=app.config['BACKUP_PAGES_PER_STEP'],
+                               sleep=app.config['BACKUP_STEP_SLEEP'])
+    print(f'Backup written to {snapshot}')
+
+@app.cli.command('restore')
+@click.argument('snapshot')
+@click.option('--tenant', default=None, help='Hospital to run against (default database if omitted).')
+@click.confirmation_option(prompt='This overwrites the current database. Continue?')
+def restore_command(snapshot, tenant):
+    """Restore the database from a snapshot taken with 'flask backup'."""
+    with use_tenant(tenant):
+        db_path = database_path(db.session.get_bind())
+    restore_backup(snapshot, db_path)
+    print(f'Restored {db_path} from {snapshot}')
+
+@app.cli.command('upgrade-db')
+@click.option('--tenant', default=None, help='Hospital to run against (default database if omitted).')
+def upgrade_db_command(tenant):
+    """Add columns, indexes and read tables introduced since the database was created."""
+    with use_tenant(tenant):
+        db.metadata.create_all(bind=db.session.get_bind())
+        changes = upgrade_schema()
+        stamped = backfill_change_seqs()
+        rewritten = migrate_treatment_text()
+        filled = fill_empty_read_models()
+    print(f"Schema upgraded ({', '.join(changes) or 'already up to date'}); "
+          f"{stamped} rows stamped for sync; {rewritten} treatments summarized/compressed.")
+    for table, count in filled.items():
+        print(f'Filled empty read table {table} with {count} rows.')
+    if rewritten:
+        print('Run VACUUM on the database to return the freed pages to the filesystem.')
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Fingerprint and precompress the files under static/ into static/dist/."""
+    app.extensions['assets'] = build_assets(app.static_folder)
+    print(f"Built {len(app.extensions['assets'])} assets.")
+
+@app.cli.command('init-tenant')
+@click.argument('tenant')
+def init_tenant_command(tenant):
+    """Create the database tables and seed data for a new hospital."""
+    from setup_database import create_initial_data
+    if tenant not in app.config['TENANTS']:
+        print(f'Unknown tenant "{tenant}". Add it to TENANTS first.')
+        return
+    os.makedirs(os.path.join(basedir, 'tenants'), exist_ok=True)
+    create_initial_data(tenant)
+
 # --- RUN SCRIPT ---
 
 if __name__ == '__main__':
@@ -0,0 +1,158 @@
+"""
+Self-hosted static asset pipeline.
+
+`build_assets` copies every file under static/ (except the build output) into
+static/dist/ under a content-hashed name, e.g.
+`vendor/bootstrap/css/bootstrap.min.<hash>.css`, rewrites relative `url()`
+references inside CSS to the hashed names, and writes gzip (and, when the
+optional `brotli` package is installed, brotli) variants next to each
+compressible file. The logical -> hashed mapping is saved in manifest.json.
+If static/ is read-only and the build cannot be written, the app still
+starts and templates fall back to the plain /static/ URLs.
+
+Templates call `asset_url('vendor/bootstrap/css/bootstrap.min.css')`; the
+`/assets/` route serves the hashed file (or its precompressed variant, chosen
+from Accept-Encoding) with a far-future immutable Cache-Control, since a
+content change always produces a new URL.
+"""
+from flask import request, send_file, url_for, abort
+from werkzeug.security import safe_join
+import mimetypes
+import posixpath
+import hashlib
+import gzip
+import json
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # Listed in requirements.txt; without it only gzip variants are built
+    brotli = None
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.map')
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+CSS_URL_RE = re.compile(r'url\((["\']?)([^"\')]+)\1\)')
+
+
+def _hashed_name(path, content):
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    base, ext = posixpath.splitext(path)
+    return f'{base}.{digest}{ext}'
+
+
+def _write_atomic(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def _rewrite_css_urls(css_path, content, manifest):
+    """Point relative url() references in a stylesheet at their hashed names."""
+    css_dir = posixpath.dirname(css_path)
+
+    def replace(match):
+        quote, ref = match.groups()
+        if ref.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        target = posixpath.normpath(posixpath.join(css_dir, re.split(r'[?#]', ref, 1)[0]))
+        if target not in manifest:
+            return match.group(0)
+        return f'url({quote}{posixpath.relpath(manifest[target], css_dir)}{quote})'
+
+    text = content.decode('utf-8')
+    return CSS_URL_RE.sub(replace, text).encode('utf-8')
+
+
+def _source_files(static_folder):
+    for root, dirs, files in os.walk(static_folder):
+        if os.path.abspath(root) == os.path.abspath(static_folder):
+            dirs[:] = [d for d in dirs if d != DIST_DIR]
+        for name in files:
+            full = os.path.join(root, name)
+            yield os.path.relpath(full, static_folder).replace(os.sep, '/'), full
+
+
+def build_assets(static_folder):
+    """Fingerprint and precompress everything under static/. Returns the manifest."""
+    dist = os.path.join(static_folder, DIST_DIR)
+    # Stylesheets go last so the files they reference are already hashed
+    sources = sorted(_source_files(static_folder), key=lambda item: (item[0].endswith('.css'), item[0]))
+
+    manifest = {}
+    for logical, full in sources:
+        with open(full, 'rb') as f:
+            content = f.read()
+        if logical.endswith('.css'):
+            content = _rewrite_css_urls(logical, content, manifest)
+        hashed = _hashed_name(logical, content)
+        manifest[logical] = hashed
+
+        target = os.path.join(dist, hashed)
+        if os.path.exists(target):
+            continue
+        _write_atomic(target, content)
+        if logical.endswith(COMPRESSIBLE):
+            _write_atomic(target + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+            if brotli is not None:
+                _write_atomic(target + '.br', brotli.compress(content))
+
+    _write_atomic(os.path.join(dist, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+def load_manifest(static_folder, rebuild=False):
+    """Read the manifest, rebuilding it first if any source file is newer."""
+    manifest_path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    if not rebuild and os.path.exists(manifest_path):
+        built_at = os.path.getmtime(manifest_path)
+        if all(os.path.getmtime(full) <= built_at for _, full in _source_files(static_folder)):
+            with open(manifest_path) as f:
+                return json.load(f)
+    return build_assets(static_folder)
+
+
+def init_assets(app):
+    """Build (if needed) the asset manifest and register the serving route and template helper."""
+    try:
+        manifest = load_manifest(app.static_folder)
+    except OSError:
+        app.logger.warning('Could not build static assets into %s; serving plain static URLs',
+                           os.path.join(app.static_folder, DIST_DIR), exc_info=True)
+        manifest = {}
+    app.extensions['assets'] = manifest
+    dist = os.path.join(app.static_folder, DIST_DIR)
+
+    @app.route('/assets/<path:filename>')
+    def serve_asset(filename):
+        path = safe_join(dist, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+        encoding = None
+        for name, ext in (('br', '.br'), ('gzip', '.gz')):
+            if request.accept_encodings[name] and os.path.isfile(path + ext):
+                path, encoding = path + ext, name
+                break
+
+        response = send_file(path, mimetype=mimetype, conditional=True)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Cache-Control'] = CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
+
+    @app.template_global()
+    def asset_url(filename):
+        """URL of the fingerprinted copy of a file under static/."""
+        hashed = app.extensions['assets'].get(filename)
+        if hashed is None:
+            return url_for('static', filename=filename)
+        return url_for('serve_asset', filename=hashed)
+
+    return manifest
@@ -0,0 +1,240 @@
+"""
+Append-only audit log with write-behind batching.
+
+Session events capture who changed what (with before/after values) for the
+audited models. Entries are held on the session until the transaction
+commits, then handed to an in-memory buffer that a background thread writes
+to the `audit_log` table in batches - when the buffer reaches
+AUDIT_BATCH_SIZE, every AUDIT_FLUSH_INTERVAL seconds, and at shutdown - so
+the request that made the change does not pay for an extra INSERT.
+
+A batch that fails to write (for example while SQLite is busy under write
+load) goes back into the buffer and is retried with exponential backoff.
+After AUDIT_MAX_RETRIES failed attempts, or at shutdown, it is appended to
+an NDJSON segment file in AUDIT_SPILL_DIR instead; entries are only dropped,
+with a critical log message, if that write fails too.
+"""
+from flask import g, current_app, has_app_context, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, inspect, insert
+from extensions import db
+from models import User, Doctor, Appointment, Treatment, AuditLog
+import threading
+import datetime
+import atexit
+import json
+import time
+import os
+
+# Model -> columns recorded in the log. Password hashes and treatment text are
+# deliberately left out.
+AUDITED_COLUMNS = {
+    Appointment: ('patient_id', 'doctor_id', 'appointment_date', 'appointment_time', 'status'),
+    User: ('email', 'name', 'role', 'is_active'),
+    Doctor: ('user_id', 'department_id', 'availability'),
+    Treatment: ('appointment_id',),
+}
+
+
+def _json_value(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def _actor():
+    # Only use a user Flask-Login has already loaded for this request; loading
+    # one here would query the database in the middle of a flush.
+    if has_request_context():
+        user = g.get('_login_user')
+        if user is not None and getattr(user, 'is_authenticated', False):
+            return user.id, user.email
+    return None, None
+
+
+def _entry(obj, action):
+    columns = AUDITED_COLUMNS[type(obj)]
+    state = inspect(obj)
+    changes = {}
+    for column in columns:
+        if action == 'update':
+            history = state.attrs[column].history
+            if not history.has_changes():
+                continue
+            before = history.deleted[0] if history.deleted else None
+            after = history.added[0] if history.added else None
+            changes[column] = [_json_value(before), _json_value(after)]
+        elif action == 'create':
+            changes[column] = [None, _json_value(getattr(obj, column))]
+        else:
+            changes[column] = [_json_value(getattr(obj, column)), None]
+    if action == 'update' and not changes:
+        return None
+
+    actor_id, actor_email = _actor()
+    return {
+        'created_at': datetime.datetime.now(),
+        'actor_id': actor_id,
+        'actor_email': actor_email,
+        'table_name': type(obj).__tablename__,
+        'row_id': obj.id,
+        'action': action,
+        'changes': json.dumps(changes, default=str),
+    }
+
+
+class AuditWriter:
+    """Buffers committed audit entries and writes them out in batches."""
+
+    def __init__(self, app, batch_size=100, flush_interval=5.0, max_retries=5, retry_backoff=1.0,
+                 spill_dir=None):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.spill_dir = spill_dir
+        self._buffer = []
+        self._failures = {}  # tenant -> (failed attempts, monotonic time of next retry)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add(self, tenant, entries):
+        with self._lock:
+            self._buffer.extend((tenant, entry) for entry in entries)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self, final=False):
+        """
+        Write everything buffered so far, except tenants still backing off
+        after a failed write. Safe to call from any thread. With `final`,
+        batches that cannot be written are spilled instead of retried.
+        """
+        now = time.monotonic()
+        with self._lock:
+            waiting = {tenant for tenant, (_, retry_at) in self._failures.items() if retry_at > now and not final}
+            batch = [item for item in self._buffer if item[0] not in waiting]
+            self._buffer = [item for item in self._buffer if item[0] in waiting]
+        if not batch:
+            return 0
+
+        by_tenant = {}
+        for tenant, entry in batch:
+            by_tenant.setdefault(tenant, []).append(entry)
+
+        written = 0
+        with self.app.app_context():
+            for tenant, entries in by_tenant.items():
+                try:
+                    engine = self.app.extensions['tenancy'].get_engine(tenant) if tenant else db.engine
+                    with engine.begin() as connection:
+                        connection.execute(insert(AuditLog.__table__), entries)
+                except Exception:
+                    self._write_failed(tenant, entries, final)
+                else:
+                    written += len(entries)
+                    with self._lock:
+                        self._failures.pop(tenant, None)
+        return written
+
+    def _write_failed(self, tenant, entries, final):
+        with self._lock:
+            attempts = self._failures.get(tenant, (0, 0))[0] + 1
+            retry = attempts < self.max_retries and not final
+            if retry:
+                delay = self.retry_backoff * 2 ** (attempts - 1)
+                self._failures[tenant] = (attempts, time.monotonic() + delay)
+                # Back at the front, so entries keep their order
+                self._buffer[:0] = [(tenant, entry) for entry in entries]
+            else:
+                self._failures.pop(tenant, None)
+        if retry:
+            self.app.logger.warning('Could not write %d audit entries (attempt %d), retrying in %.1fs',
+                                    len(entries), attempts, delay, exc_info=True)
+        else:
+            self.app.logger.error('Could not write %d audit entries after %d attempts',
+                                  len(entries), attempts, exc_info=True)
+            self._spill(tenant, entries)
+
+    def _spill(self, tenant, entries):
+        """Append entries the database would not take to an NDJSON segment file."""
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = os.path.join(self.spill_dir, f"audit-{tenant or 'default'}-{datetime.date.today():%Y%m%d}.ndjson")
+            with open(path, 'a', encoding='utf-8') as segment:
+                for entry in entries:
+                    segment.write(json.dumps(entry, default=_json_value) + '\n')
+                segment.flush()
+                os.fsync(segment.fileno())
+        except Exception:
+            self.app.logger.critical('DROPPED %d audit entries for tenant %r: could not spill them either',
+                                     len(entries), tenant, exc_info=True)
+        else:
+            self.app.logger.error('Spilled %d audit entries to %s', len(entries), path)
+
+    def close(self):
+        self._stopped.set()
+        self._wakeup.set()
+        self.flush(final=True)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+# --- SESSION EVENTS ---
+
+@event.listens_for(Session, 'after_flush')
+def _collect_audit_entries(session, flush_context):
+    pending = session.info.setdefault('audit_pending', [])
+    for objects, action in ((session.new, 'create'), (session.dirty, 'update'), (session.deleted, 'delete')):
+        for obj in objects:
+            if type(obj) in AUDITED_COLUMNS:
+                entry = _entry(obj, action)
+                if entry is not None:
+                    pending.append(entry)
+
+
+@event.listens_for(Session, 'after_commit')
+def _queue_audit_entries(session):
+    pending = session.info.pop('audit_pending', None)
+    if pending and has_app_context():
+        writer = current_app.extensions.get('audit')
+        if writer is not None:
+            writer.add(g.get('tenant'), pending)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_audit_entries(session):
+    session.info.pop('audit_pending', None)
+
+
+@event.listens_for(AuditLog, 'before_update')
+@event.listens_for(AuditLog, 'before_delete')
+def _audit_log_is_append_only(mapper, connection, target):
+    raise RuntimeError('audit_log is append-only.')
+
+
+def init_audit(app):
+    """Start the background audit writer for this app."""
+    writer = AuditWriter(
+        app,
+        batch_size=app.config['AUDIT_BATCH_SIZE'],
+        flush_interval=app.config['AUDIT_FLUSH_INTERVAL'],
+        max_retries=app.config['AUDIT_MAX_RETRIES'],
+        retry_backoff=app.config['AUDIT_RETRY_BACKOFF'],
+        spill_dir=app.config['AUDIT_SPILL_DIR'],
+    )
+    app.extensions['audit'] = writer
+    writer.start()
+    return writer
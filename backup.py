@@ -0,0 +1,216 @@
+"""
+Online backups and restores of the SQLite database.
+
+Snapshots are taken with SQLite's online backup API, a few pages per step
+with a short sleep between steps so the app's writers are never locked out
+for long. The copy is gzip-compressed into BACKUP_DIR as
+`<name>-YYYYmmdd-HHMMSS-ffffff.db.gz` with a `.sha256` checksum file next to it,
+and only the newest BACKUP_KEEP snapshots are kept. Tenant databases are
+written to BACKUP_DIR/tenants/<tenant>/ (see `snapshot_dir`) so they never
+share a directory with the default database or with each other.
+
+In WAL mode (see SQLITE_WAL) the copy reads from one snapshot, so writers
+carry on while it runs. Otherwise SQLite restarts the copy whenever the
+database is written to mid-backup; after `max_restarts` restarts the
+remainder is copied in a single step so the backup always finishes.
+
+`restore_backup` verifies the checksum and integrity of a snapshot and then
+copies it into the live database through the same backup API, so open
+connections never see a half-written file.
+"""
+from sqlalchemy.engine import make_url
+import threading
+import tempfile
+import datetime
+import hashlib
+import sqlite3
+import shutil
+import gzip
+import time
+import os
+import re
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def database_path(engine):
+    """Filesystem path of a SQLite engine's database."""
+    url = make_url(str(engine.url))
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        raise ValueError(f'Online backups need a file-based SQLite database, not {url.drivername}.')
+    return url.database
+
+
+def _copy_online(source, target, pages, sleep, max_restarts):
+    # In WAL mode a read transaction pins a consistent snapshot without blocking
+    # writers, so the step-wise copy never has to restart.
+    wal = source.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    if wal:
+        source.execute('BEGIN')
+        source.execute('SELECT count(*) FROM sqlite_master').fetchone()
+
+    state = {'remaining': None, 'restarts': 0}
+
+    def progress(status, remaining, total):
+        if state['remaining'] is not None and remaining > state['remaining']:
+            state['restarts'] += 1
+            if state['restarts'] > max_restarts:
+                raise _TooManyRestarts()
+        state['remaining'] = remaining
+
+    try:
+        source.backup(target, pages=pages, progress=progress, sleep=sleep)
+    except _TooManyRestarts:
+        source.backup(target, pages=-1)
+    finally:
+        if wal:
+            source.execute('COMMIT')
+    return state['restarts']
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_dir(base_dir, tenant=None):
+    """Directory holding the snapshots of the default database or of one tenant."""
+    return base_dir if tenant is None else os.path.join(base_dir, 'tenants', tenant)
+
+
+def _snapshots(dest_dir, name):
+    """Snapshots of database `name` in dest_dir, oldest first."""
+    # Snapshots taken before microseconds were added to the name have no -ffffff part
+    pattern = re.compile(rf'{re.escape(name)}-(\d{{8}})-(\d{{6}})(?:-(\d{{6}}))?\.db\.gz')
+    matches = [((m[1], m[2], m[3] or ''), entry) for entry in os.listdir(dest_dir)
+               if (m := pattern.fullmatch(entry))]
+    return [os.path.join(dest_dir, entry) for _, entry in sorted(matches)]
+
+
+def backup_database(db_path, dest_dir, keep=7, pages=1024, sleep=0.005, max_restarts=10):
+    """Take a compressed, checksummed snapshot of db_path. Returns the snapshot path."""
+    os.makedirs(dest_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(db_path))[0]
+    stamp = datetime.datetime.now()
+    # Never overwrite an earlier snapshot, even if the clock has not moved on
+    while os.path.exists(snapshot := os.path.join(dest_dir, f"{name}-{stamp:%Y%m%d-%H%M%S-%f}.db.gz")):
+        stamp += datetime.timedelta(microseconds=1)
+
+    fd, raw_copy = tempfile.mkstemp(suffix='.db', dir=dest_dir)
+    os.close(fd)
+    try:
+        source = sqlite3.connect(db_path, isolation_level=None)
+        target = sqlite3.connect(raw_copy)
+        try:
+            _copy_online(source, target, pages, sleep, max_restarts)
+        finally:
+            target.close()
+            source.close()
+
+        partial = snapshot + '.part'
+        with open(raw_copy, 'rb') as src, gzip.open(partial, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        os.replace(partial, snapshot)
+    finally:
+        os.remove(raw_copy)
+
+    with open(snapshot + '.sha256', 'w') as f:
+        f.write(f'{_sha256(snapshot)}  {os.path.basename(snapshot)}\n')
+
+    for old in _snapshots(dest_dir, name)[:-keep] if keep > 0 else []:
+        os.remove(old)
+        if os.path.exists(old + '.sha256'):
+            os.remove(old + '.sha256')
+    return snapshot
+
+
+def verify_snapshot(snapshot):
+    """Raise ValueError if the snapshot does not match its checksum file."""
+    checksum_file = snapshot + '.sha256'
+    if not os.path.exists(checksum_file):
+        raise ValueError(f'Missing checksum file {checksum_file}.')
+    with open(checksum_file) as f:
+        expected = f.read().split()[0]
+    if _sha256(snapshot) != expected:
+        raise ValueError(f'Checksum mismatch for {snapshot}.')
+
+
+def restore_backup(snapshot, db_path):
+    """Verify a snapshot and copy it into db_path."""
+    verify_snapshot(snapshot)
+    fd, raw_copy = tempfile.mkstemp(suffix='.db', dir=os.path.dirname(os.path.abspath(db_path)))
+    os.close(fd)
+    try:
+        with gzip.open(snapshot, 'rb') as src, open(raw_copy, 'wb') as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+        source = sqlite3.connect(raw_copy)
+        try:
+            result = source.execute('PRAGMA integrity_check').fetchone()[0]
+            if result != 'ok':
+                raise ValueError(f'Snapshot failed integrity check: {result}')
+            target = sqlite3.connect(db_path)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+        finally:
+            source.close()
+    finally:
+        os.remove(raw_copy)
+
+
+# --- SCHEDULED BACKUPS ---
+
+def _acquire_lock(dest_dir, interval):
+    """Only one worker process runs the scheduled backup per interval."""
+    os.makedirs(dest_dir, exist_ok=True)
+    lock = os.path.join(dest_dir, '.backup.lock')
+    try:
+        if time.time() - os.path.getmtime(lock) > interval:
+            os.remove(lock)
+    except FileNotFoundError:
+        pass
+    try:
+        os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return False
+    return True
+
+
+def init_backups(app, engines):
+    """
+    Start the scheduled backup thread when BACKUP_INTERVAL (seconds) is set.
+    `engines` is a callable returning (tenant, engine) pairs to back up,
+    with tenant None for the default database.
+    """
+    interval = app.config['BACKUP_INTERVAL']
+    if not interval:
+        return None
+    dest_dir = app.config['BACKUP_DIR']
+
+    def run():
+        while True:
+            time.sleep(interval)
+            if not _acquire_lock(dest_dir, interval):
+                continue
+            with app.app_context():
+                for tenant, engine in engines():
+                    try:
+                        backup_database(database_path(engine), snapshot_dir(dest_dir, tenant),
+                                        keep=app.config['BACKUP_KEEP'],
+                                        pages=app.config['BACKUP_PAGES_PER_STEP'],
+                                        sleep=app.config['BACKUP_STEP_SLEEP'])
+                    except Exception:
+                        app.logger.exception('Scheduled backup failed')
+
+    thread = threading.Thread(target=run, name='scheduled-backup', daemon=True)
+    thread.start()
+    return thread
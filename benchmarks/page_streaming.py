@@ -0,0 +1,150 @@
+"""
+Benchmark: time-to-first-byte and bytes-on-wire for the large list pages.
+
+Seeds a throwaway tenant database with N patients (and a doctor with a long
+appointment history), then requests the admin patient list and the doctor
+dashboard, which are streamed, with and without gzip. The buffered baseline
+is the same template rendered in full with render_template.
+
+The patient history page is paginated and rendered normally (not streamed);
+it is measured too, for comparison, and labelled as rendered.
+
+Usage:
+    python benchmarks/page_streaming.py [--patients 5000] [--runs 5]
+"""
+import argparse
+import datetime
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TENANT = 'bench'
+DB_DIR = tempfile.mkdtemp(prefix='hms-bench-')
+os.environ.setdefault('SECRET_KEY', 'bench')
+os.environ['TENANTS'] = TENANT
+os.environ['TENANT_DATABASE_URI_TEMPLATE'] = 'sqlite:///' + os.path.join(DB_DIR, '{tenant}.db')
+
+from flask import render_template  # noqa: E402
+from sqlalchemy.orm import contains_eager  # noqa: E402
+from app import app, db  # noqa: E402
+from models import User, Doctor, Patient, Appointment, Treatment, Department  # noqa: E402
+from tenancy import use_tenant  # noqa: E402
+
+HEADERS = {'X-Tenant': TENANT}
+
+
+def seed(patient_count):
+    with app.app_context(), use_tenant(TENANT):
+        db.metadata.create_all(bind=db.session.get_bind())
+        dept = Department(name='Cardiology')
+        admin = User(email='admin@example.com', name='Admin', role='admin')
+        admin.set_password('password123')
+        doc_user = User(email='doc@example.com', name='Doctor Bench', role='doctor')
+        doc_user.set_password('password123')
+        db.session.add_all([dept, admin, doc_user])
+        db.session.flush()
+        doctor = Doctor(user_id=doc_user.id, department_id=dept.id)
+        db.session.add(doctor)
+        db.session.flush()
+
+        today = datetime.date.today()
+        patients = []
+        for i in range(patient_count):
+            user = User(email=f'p{i}@example.com', name=f'Patient {i:06d}', role='patient',
+                        password_hash='x')
+            patients.append(Patient(user=user, contact_phone=f'555-{i:07d}'))
+        db.session.add_all(patients)
+        db.session.flush()
+
+        # One long-standing patient with a lot of history, plus a busy doctor calendar
+        history_patient = patients[0]
+        for i in range(min(patient_count, 1000)):
+            appt = Appointment(patient_id=history_patient.id if i % 2 else patients[i].id,
+                               doctor_id=doctor.id,
+                               appointment_date=today - datetime.timedelta(days=i + 1),
+                               appointment_time=datetime.time(9 + i % 8),
+                               status='Completed')
+            appt.treatment = Treatment(diagnosis=f'Diagnosis {i}\n' * 5,
+                                       prescription='Rx ' * 50, notes='Note ' * 200)
+            db.session.add(appt)
+        db.session.commit()
+        return history_patient.id
+
+
+def login(client, email):
+    app.config['WTF_CSRF_ENABLED'] = False
+    client.post('/login', data={'email': email, 'password': 'password123'}, headers=HEADERS)
+    app.config['WTF_CSRF_ENABLED'] = True
+
+
+def measure(client, url, encoding):
+    start = time.perf_counter()
+    response = client.get(url, headers={**HEADERS, 'Accept-Encoding': encoding}, buffered=False)
+    body = iter(response.response)
+    size = len(next(body, b''))
+    ttfb = time.perf_counter() - start
+    for chunk in body:
+        size += len(chunk)
+    total = time.perf_counter() - start
+    response.close()
+    return ttfb, total, size
+
+
+def measure_buffered(client, url, template, context_factory):
+    """TTFB of a buffered render_template response: nothing is sent until the page is rendered."""
+    with app.test_request_context(url, headers=HEADERS):
+        app.preprocess_request()
+        start = time.perf_counter()
+        html = render_template(template, **context_factory())
+        return time.perf_counter() - start, len(html.encode('utf-8'))
+
+
+def report(label, samples):
+    ttfb = statistics.median(s[0] for s in samples) * 1000
+    total = statistics.median(s[1] for s in samples) * 1000
+    size = samples[0][2]
+    print(f'  {label:<22} ttfb {ttfb:8.1f} ms   total {total:8.1f} ms   {size / 1024:9.1f} KiB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--patients', type=int, default=5000)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    history_patient_id = seed(args.patients)
+    admin, doctor = app.test_client(), app.test_client()
+    login(admin, 'admin@example.com')
+    login(doctor, 'doc@example.com')
+
+    pages = [
+        ('admin_manage_patients', admin, '/admin/manage_patients', 'streamed'),
+        ('doctor_dashboard', doctor, '/doctor/dashboard', 'streamed'),
+        ('doctor_patient_history (page 1)', doctor, f'/doctor/patient_history/{history_patient_id}', 'rendered'),
+    ]
+    print(f'{args.patients} patients, median of {args.runs} runs')
+    for name, client, url, mode in pages:
+        print(name)
+        for encoding in ('identity', 'gzip'):
+            report(f'{mode}, {encoding}', [measure(client, url, encoding) for _ in range(args.runs)])
+
+    # Buffered baseline for the patient list (the largest page)
+    with app.app_context(), use_tenant(TENANT):
+        def context():
+            # Same eager query as the streamed route, so only the rendering differs
+            return {'title': 'Manage Patients', 'search_query': None,
+                    'patients': Patient.query.join(User).options(contains_eager(Patient.user))
+                    .order_by(User.name, Patient.id).all()}
+        samples = [measure_buffered(admin, '/admin/manage_patients', 'admin/manage_patients.html', context)
+                   for _ in range(args.runs)]
+        print('admin_manage_patients (render_template baseline)')
+        report('buffered, identity', [(t, t, size) for t, size in samples])
+
+
+if __name__ == '__main__':
+    main()
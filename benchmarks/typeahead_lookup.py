@@ -0,0 +1,80 @@
+"""
+Benchmark: typeahead index build time and lookup latency.
+
+Builds a `TypeaheadIndex` over N synthetic doctors (plus a handful of
+departments) and times prefix lookups of 1-4 characters and two-word queries,
+plus single-entry incremental updates.
+
+Usage:
+    python benchmarks/typeahead_lookup.py [--doctors 50000] [--queries 20000]
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('SECRET_KEY', 'bench')
+
+from typeahead import TypeaheadIndex  # noqa: E402
+
+FIRST = ['Amelia', 'Arjun', 'Chloé', 'Daniel', 'Fatima', 'Grace', 'Hiro', 'Isabel', 'José', 'Liam',
+         'Maya', 'Noah', 'Olivia', 'Priya', 'Rahul', 'Sofia', 'Tariq', 'Wei', 'Yusuf', 'Zoe']
+DEPARTMENTS = ['Cardiology', 'Neurology', 'Pediatrics', 'Orthopedics', 'Dermatology', 'Oncology']
+
+
+def random_surname(rng):
+    return rng.choice(string.ascii_uppercase) + ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pct = lambda p: samples[min(len(samples) - 1, int(p * len(samples)))] * 1e6  # noqa: E731
+    return f'p50 {statistics.median(samples) * 1e6:6.1f} us  p99 {pct(0.99):6.1f} us  max {samples[-1] * 1e6:7.1f} us'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--doctors', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--limit', type=int, default=8)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    names = [f'{rng.choice(FIRST)} {random_surname(rng)}' for _ in range(args.doctors)]
+
+    index = TypeaheadIndex()
+    start = time.perf_counter()
+    index.load('department', ((i, dept, {}) for i, dept in enumerate(DEPARTMENTS, 1)))
+    index.load('doctor', ((i, name, {'department': rng.choice(DEPARTMENTS)}) for i, name in enumerate(names, 1)))
+    print(f'{args.doctors} doctors indexed in {time.perf_counter() - start:.2f} s')
+
+    for label, make_query in (
+        ('1-char prefix', lambda name: name.split()[1][:1]),
+        ('3-char prefix', lambda name: name.split()[1][:3]),
+        ('full surname', lambda name: name.split()[1]),
+        ('two words', lambda name: f'{name.split()[0][:2]} {name.split()[1][:3]}'),
+    ):
+        queries = [make_query(rng.choice(names)) for _ in range(args.queries)]
+        samples = []
+        for q in queries:
+            t = time.perf_counter()
+            index.search(q, args.limit)
+            samples.append(time.perf_counter() - t)
+        print(f'  {label:<14} {percentiles(samples)}')
+
+    samples = []
+    for _ in range(min(args.queries, 5000)):
+        doctor_id = rng.randint(1, args.doctors)
+        t = time.perf_counter()
+        index.put('doctor', doctor_id, f'{rng.choice(FIRST)} {random_surname(rng)}', department='Cardiology')
+        samples.append(time.perf_counter() - t)
+    print(f'  {"update":<14} {percentiles(samples)}')
+
+
+if __name__ == '__main__':
+    main()
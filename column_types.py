@@ -0,0 +1,40 @@
+"""
+Custom column types.
+
+`CompressedText` stores long text values zlib-compressed. Values shorter than
+`min_size` bytes are stored as plain TEXT, longer ones as a BLOB; SQLite
+keeps the storage class of each value, so reads tell the two apart without
+a marker and rows written before compression was enabled still load as-is.
+"""
+from sqlalchemy.types import TypeDecorator, Text
+import zlib
+
+COMPRESS_MIN_SIZE = 512
+COMPRESS_LEVEL = 6
+
+
+class CompressedText(TypeDecorator):
+    """Text column whose long values are transparently compressed at rest."""
+
+    impl = Text
+    cache_ok = True
+
+    def __init__(self, min_size=COMPRESS_MIN_SIZE, level=COMPRESS_LEVEL, **kwargs):
+        super().__init__(**kwargs)
+        self.min_size = min_size
+        self.level = level
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        encoded = value.encode('utf-8')
+        if len(encoded) < self.min_size:
+            return value
+        compressed = zlib.compress(encoded, self.level)
+        # Keep incompressible text as text
+        return compressed if len(compressed) < len(encoded) else value
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, bytes):
+            return zlib.decompress(value).decode('utf-8')
+        return value
@@ -0,0 +1,78 @@
+"""
+Gzip compression for HTML and JSON responses.
+
+`GzipMiddleware` wraps the WSGI app and compresses responses for clients that
+accept gzip, when the body is text-like, not already encoded, and either
+larger than COMPRESS_MIN_SIZE or of unknown length (streamed pages). Streamed
+bodies are compressed incrementally: the first chunk is flushed straight
+away so time-to-first-byte is not traded for compression, and after that
+output is flushed every COMPRESS_FLUSH_SIZE bytes of input.
+"""
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+import zlib
+
+COMPRESSIBLE_TYPES = (
+    'text/html', 'text/plain', 'text/css', 'text/javascript',
+    'application/json', 'application/javascript',
+)
+
+
+class GzipMiddleware:
+
+    def __init__(self, wsgi_app, min_size=1024, level=6, flush_size=16 * 1024):
+        self.wsgi_app = wsgi_app
+        self.min_size = min_size
+        self.level = level
+        self.flush_size = flush_size
+
+    def __call__(self, environ, start_response):
+        if not parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING', ''))['gzip']:
+            return self.wsgi_app(environ, start_response)
+
+        compress = []
+
+        def _start_response(status, headers, exc_info=None):
+            headers = Headers(headers)
+            if self._should_compress(status, headers):
+                compress.append(True)
+                del headers['Content-Length']
+                headers['Content-Encoding'] = 'gzip'
+                vary = headers.get('Vary')
+                headers['Vary'] = f'{vary}, Accept-Encoding' if vary else 'Accept-Encoding'
+            return start_response(status, headers.to_wsgi_list(), exc_info)
+
+        app_iter = self.wsgi_app(environ, _start_response)
+        if not compress:
+            return app_iter
+        return self._compress(app_iter)
+
+    def _should_compress(self, status, headers):
+        if not status.startswith('200') or 'Content-Encoding' in headers:
+            return False
+        mimetype = headers.get('Content-Type', '').split(';')[0].strip()
+        if mimetype not in COMPRESSIBLE_TYPES:
+            return False
+        length = headers.get('Content-Length', type=int)
+        return length is None or length >= self.min_size
+
+    def _compress(self, app_iter):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        pending = 0
+        first = True
+        try:
+            for chunk in app_iter:
+                if not chunk:
+                    continue
+                out = compressor.compress(chunk)
+                pending += len(chunk)
+                if first or pending >= self.flush_size:
+                    out += compressor.flush(zlib.Z_SYNC_FLUSH)
+                    pending = 0
+                    first = False
+                if out:
+                    yield out
+            yield compressor.flush()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
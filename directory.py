@@ -0,0 +1,114 @@
+"""
+Keeps the denormalized `doctor_directory` read table in sync with the
+Doctor / User / Department tables.
+
+A session `after_flush` listener collects every Doctor, User and Department
+touched by the flush and rewrites the matching directory rows on the same
+connection, so the read model commits (or rolls back) together with the
+write that changed it.
+"""
+from sqlalchemy import event, select, delete, insert, or_
+from flask_sqlalchemy.session import Session
+from extensions import db
+from models import User, Doctor, Department, DoctorDirectory
+import json
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+UNAVAILABLE = ('', 'Not Available', 'Not set')
+
+
+def normalize_availability(raw):
+    """
+    Turn the raw availability JSON stored on Doctor into
+    (summary_json, available_days_bitmask).
+    """
+    try:
+        data = json.loads(raw) if raw else {}
+    except json.JSONDecodeError:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+
+    items = []
+    mask = 0
+    for i, day in enumerate(WEEKDAYS):
+        time = (data.get(day) or '').strip()
+        if time in UNAVAILABLE:
+            continue
+        items.append([day, time])
+        mask |= 1 << i
+    return json.dumps(items), mask
+
+
+def _directory_rows(connection, where_clause=None):
+    """Build directory rows straight from the source tables."""
+    query = select(
+        Doctor.id, Doctor.user_id, Doctor.department_id, Doctor.availability,
+        User.name, User.email, User.is_active, Department.name
+    ).join(User, Doctor.user_id == User.id).join(Department, Doctor.department_id == Department.id)
+    if where_clause is not None:
+        query = query.where(where_clause)
+
+    rows = []
+    for (doctor_id, user_id, department_id, availability,
+         name, email, is_active, department_name) in connection.execute(query):
+        summary, mask = normalize_availability(availability)
+        rows.append({
+            'doctor_id': doctor_id,
+            'user_id': user_id,
+            'name': name,
+            'email': email,
+            'department_id': department_id,
+            'department_name': department_name,
+            'is_active': bool(is_active),
+            'availability_summary': summary,
+            'available_days': mask,
+        })
+    return rows
+
+
+def sync_directory(connection, doctor_ids=(), user_ids=(), department_ids=()):
+    """Rewrite the directory rows affected by the given doctors, users and departments."""
+    doctor_ids, user_ids, department_ids = set(doctor_ids), set(user_ids), set(department_ids)
+    if not (doctor_ids or user_ids or department_ids):
+        return
+
+    directory = DoctorDirectory.__table__
+    connection.execute(delete(directory).where(or_(
+        directory.c.doctor_id.in_(doctor_ids),
+        directory.c.user_id.in_(user_ids),
+        directory.c.department_id.in_(department_ids),
+    )))
+    rows = _directory_rows(connection, or_(
+        Doctor.id.in_(doctor_ids),
+        Doctor.user_id.in_(user_ids),
+        Doctor.department_id.in_(department_ids),
+    ))
+    if rows:
+        connection.execute(insert(directory), rows)
+
+
+def rebuild_directory():
+    """Rebuild the whole directory table from scratch (used for backfills)."""
+    connection = db.session.connection()
+    connection.execute(delete(DoctorDirectory.__table__))
+    rows = _directory_rows(connection)
+    if rows:
+        connection.execute(insert(DoctorDirectory.__table__), rows)
+    db.session.commit()
+    return len(rows)
+
+
+# --- ORM EVENTS ---
+
+@event.listens_for(Session, 'after_flush')
+def _sync_directory_after_flush(session, flush_context):
+    doctor_ids, user_ids, department_ids = set(), set(), set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Doctor) and obj.id is not None:
+            doctor_ids.add(obj.id)
+        elif isinstance(obj, User) and obj.id is not None and obj.role == 'doctor':
+            user_ids.add(obj.id)
+        elif isinstance(obj, Department) and obj.id is not None:
+            department_ids.add(obj.id)
+    sync_directory(session.connection(), doctor_ids, user_ids, department_ids)
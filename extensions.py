@@ -1,8 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
+from tenancy import TenantSession
 
-# Create database object
-db = SQLAlchemy()
+# Create database object (sessions route to the current tenant's database)
+db = SQLAlchemy(session_options={'class_': TenantSession})
 
 # Create  login manager object
 login_manager = LoginManager()
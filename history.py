@@ -0,0 +1,149 @@
+"""
+Keeps the `patient_summary` read table in sync with completed appointments.
+
+A session `after_flush` listener collects the patients whose completed
+visits changed in the flush (a treatment saved, edited or removed, or an
+appointment's status, date or doctor changed) and recomputes their summary
+rows on the same connection, so the summary commits together with the
+treatment. Each recompute reads one aggregate row, the last few visits and
+the prescriptions of the last HISTORY_ACTIVE_PRESCRIPTION_DAYS days per
+patient, never the full history.
+
+Each treatment's own `summary` column (the first line of its diagnosis, used
+by list views instead of the deferred full text) is set here too, whenever
+the diagnosis is assigned.
+"""
+from flask import current_app, has_app_context
+from sqlalchemy import event, select, delete, insert, func
+from flask_sqlalchemy.session import Session
+from extensions import db
+from models import User, Doctor, Appointment, Treatment, PatientSummary
+import datetime
+import json
+
+RECENT_VISITS = 5
+ACTIVE_PRESCRIPTION_DAYS = 90
+SUMMARY_TEXT_LENGTH = 200
+
+
+def summarize_text(text, length=SUMMARY_TEXT_LENGTH):
+    """First non-empty line of `text`, cut to `length` characters."""
+    line = next((line.strip() for line in (text or '').splitlines() if line.strip()), '')
+    return line if len(line) <= length else line[:length - 1].rstrip() + '…'
+
+
+def _active_prescription_days():
+    if has_app_context():
+        return current_app.config.get('HISTORY_ACTIVE_PRESCRIPTION_DAYS', ACTIVE_PRESCRIPTION_DAYS)
+    return ACTIVE_PRESCRIPTION_DAYS
+
+
+def _summary_rows(connection, patient_ids=None):
+    """Build summary rows straight from the appointment and treatment tables."""
+    completed = (Appointment.status == 'Completed',)
+    if patient_ids is not None:
+        completed += (Appointment.patient_id.in_(patient_ids),)
+
+    totals = connection.execute(
+        select(Appointment.patient_id, func.count(), func.max(Appointment.appointment_date))
+        .join(Treatment, Treatment.appointment_id == Appointment.id)
+        .where(*completed)
+        .group_by(Appointment.patient_id)
+    ).all()
+
+    newest_first = (Appointment.appointment_date.desc(), Appointment.appointment_time.desc(), Appointment.id.desc())
+
+    # The last few visits of each patient, newest first
+    ranked = (
+        select(Appointment.patient_id, Appointment.appointment_date, User.name.label('doctor_name'),
+               Treatment.summary,
+               func.row_number().over(partition_by=Appointment.patient_id, order_by=newest_first)
+               .label('position'))
+        .join(Treatment, Treatment.appointment_id == Appointment.id)
+        .join(Doctor, Appointment.doctor_id == Doctor.id)
+        .join(User, Doctor.user_id == User.id)
+        .where(*completed)
+        .subquery()
+    )
+    recent = {}
+    for patient_id, day, doctor_name, diagnosis, _ in connection.execute(
+        select(ranked).where(ranked.c.position <= RECENT_VISITS)
+        .order_by(ranked.c.patient_id, ranked.c.position)
+    ):
+        recent.setdefault(patient_id, []).append((day.isoformat(), doctor_name, diagnosis))
+
+    # Every prescription still active, however many visits that spans
+    cutoff = datetime.date.today() - datetime.timedelta(days=_active_prescription_days())
+    prescriptions = {}
+    for patient_id, day, doctor_name, prescription in connection.execute(
+        select(Appointment.patient_id, Appointment.appointment_date, User.name, Treatment.prescription)
+        .join(Treatment, Treatment.appointment_id == Appointment.id)
+        .join(Doctor, Appointment.doctor_id == Doctor.id)
+        .join(User, Doctor.user_id == User.id)
+        .where(*completed, Appointment.appointment_date >= cutoff,
+               func.trim(func.coalesce(Treatment.prescription, '')) != '')
+        .order_by(Appointment.patient_id, *newest_first)
+    ):
+        prescriptions.setdefault(patient_id, []).append([day.isoformat(), doctor_name, summarize_text(prescription)])
+
+    now = datetime.datetime.now()
+    rows = []
+    for patient_id, visit_count, last_visit in totals:
+        visits = recent.get(patient_id, [])
+        rows.append({
+            'patient_id': patient_id,
+            'visit_count': visit_count,
+            'last_visit': last_visit,
+            'last_doctor_name': visits[0][1] if visits else None,
+            'recent_diagnoses': json.dumps([list(visit) for visit in visits]),
+            'recent_prescriptions': json.dumps(prescriptions.get(patient_id, [])),
+            'updated_at': now,
+        })
+    return rows
+
+
+def sync_summaries(connection, patient_ids):
+    """Recompute the summary rows of the given patients."""
+    patient_ids = set(patient_ids)
+    if not patient_ids:
+        return
+    summary = PatientSummary.__table__
+    connection.execute(delete(summary).where(summary.c.patient_id.in_(patient_ids)))
+    rows = _summary_rows(connection, patient_ids)
+    if rows:
+        connection.execute(insert(summary), rows)
+
+
+def rebuild_summaries():
+    """Rebuild every patient's summary from scratch (used for backfills)."""
+    connection = db.session.connection()
+    connection.execute(delete(PatientSummary.__table__))
+    rows = _summary_rows(connection)
+    for start in range(0, len(rows), 10_000):
+        connection.execute(insert(PatientSummary.__table__), rows[start:start + 10_000])
+    db.session.commit()
+    return len(rows)
+
+
+# --- ORM EVENTS ---
+
+@event.listens_for(Treatment.diagnosis, 'set')
+def _set_treatment_summary(target, value, oldvalue, initiator):
+    target.summary = summarize_text(value)
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_summaries_after_flush(session, flush_context):
+    patient_ids, appointment_ids = set(), set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Appointment) and obj.patient_id is not None:
+            patient_ids.add(obj.patient_id)
+        elif isinstance(obj, Treatment) and obj.appointment_id is not None:
+            appointment_ids.add(obj.appointment_id)
+
+    connection = session.connection()
+    if appointment_ids:
+        patient_ids.update(connection.execute(
+            select(Appointment.patient_id).where(Appointment.id.in_(appointment_ids))
+        ).scalars())
+    sync_summaries(connection, patient_ids)
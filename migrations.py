@@ -0,0 +1,113 @@
+"""
+Minimal in-place schema upgrades for existing databases.
+
+`db.create_all()` creates new tables but never alters existing ones, so
+columns added to existing models are listed here and added with
+ALTER TABLE when missing. Each entry is (table, column, DDL type/default).
+Data migrations that go with a column change live here too, as does the
+initial fill of read tables created by an upgrade.
+"""
+from sqlalchemy import inspect, text, select, update, bindparam, cast, func, or_, and_, LargeBinary
+from extensions import db
+from models import Treatment, DoctorDirectory, AppointmentRollup, PatientSummary
+from history import summarize_text, rebuild_summaries
+from directory import rebuild_directory
+from analytics import backfill_rollups
+
+ADDED_COLUMNS = [
+    ('user', 'updated_at', 'DATETIME'),
+    ('user', 'change_seq', 'INTEGER NOT NULL DEFAULT 0'),
+    ('doctor', 'updated_at', 'DATETIME'),
+    ('doctor', 'change_seq', 'INTEGER NOT NULL DEFAULT 0'),
+    ('appointment', 'updated_at', 'DATETIME'),
+    ('appointment', 'change_seq', 'INTEGER NOT NULL DEFAULT 0'),
+    ('treatment', 'summary', "VARCHAR(200) NOT NULL DEFAULT ''"),
+]
+
+# Read table -> function that fills it from the source tables
+READ_MODELS = [
+    (DoctorDirectory, rebuild_directory),
+    (AppointmentRollup, backfill_rollups),
+    (PatientSummary, rebuild_summaries),
+]
+
+ADDED_INDEXES = [
+    ('ix_user_change_seq', 'user', 'change_seq'),
+    ('ix_doctor_change_seq', 'doctor', 'change_seq'),
+    ('ix_appointment_change_seq', 'appointment', 'change_seq'),
+    ('ix_appointment_patient_id', 'appointment', 'patient_id'),
+]
+
+
+def upgrade_schema():
+    """Add any missing columns and indexes. Returns the list of changes made."""
+    connection = db.session.connection()
+    inspector = inspect(connection)
+    quote = connection.dialect.identifier_preparer.quote
+    changes = []
+
+    for table, column, ddl in ADDED_COLUMNS:
+        existing = {c['name'] for c in inspector.get_columns(table)}
+        if column not in existing:
+            connection.execute(text(f'ALTER TABLE {quote(table)} ADD COLUMN {quote(column)} {ddl}'))
+            changes.append(f'{table}.{column}')
+
+    for name, table, column in ADDED_INDEXES:
+        existing = {i['name'] for i in inspector.get_indexes(table)}
+        if name not in existing:
+            connection.execute(text(f'CREATE INDEX {quote(name)} ON {quote(table)} ({quote(column)})'))
+            changes.append(name)
+
+    db.session.commit()
+    return changes
+
+
+def migrate_treatment_text(batch_size=500):
+    """
+    Fill in Treatment.summary for rows that predate it and rewrite long
+    plain-text notes so they are stored compressed. Returns the rows rewritten.
+    """
+    treatment = Treatment.__table__
+    min_size = treatment.c.notes.type.min_size
+    connection = db.session.connection()
+    needs_rewrite = or_(
+        treatment.c.summary == '',
+        and_(func.typeof(treatment.c.notes) == 'text',
+             func.length(cast(treatment.c.notes, LargeBinary)) >= min_size),
+    )
+    rewrite = (
+        update(treatment)
+        .where(treatment.c.id == bindparam('row_id'))
+        .values(summary=bindparam('new_summary'), notes=bindparam('new_notes', type_=treatment.c.notes.type))
+    )
+
+    rewritten, last_id = 0, 0
+    while True:
+        rows = connection.execute(
+            select(treatment.c.id, treatment.c.diagnosis, treatment.c.notes)
+            .where(treatment.c.id > last_id, needs_rewrite)
+            .order_by(treatment.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        connection.execute(rewrite, [
+            {'row_id': row_id, 'new_summary': summarize_text(diagnosis), 'new_notes': notes}
+            for row_id, diagnosis, notes in rows
+        ])
+        rewritten += len(rows)
+        last_id = rows[-1][0]
+        db.session.commit()
+        connection = db.session.connection()
+    return rewritten
+
+
+def fill_empty_read_models():
+    """
+    Fill read tables that are still empty (e.g. just created by an upgrade).
+    Returns {table name: rows written}.
+    """
+    filled = {}
+    for model, rebuild in READ_MODELS:
+        if db.session.execute(select(model).limit(1)).first() is None:
+            filled[model.__tablename__] = rebuild()
+    return filled
@@ -1,4 +1,6 @@
 from extensions import db, login_manager
+from column_types import CompressedText
+from flask import g, has_app_context
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 import datetime
@@ -7,12 +9,19 @@ import json  # <-- ADD THIS IMPORT
 # This is the 'loader' function for Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
+    # Ids are "<tenant>:<id>" (see User.get_id); ids issued by another hospital are rejected
+    tenant, _, raw_id = str(user_id).rpartition(':')
+    if (tenant or None) != _current_tenant() or not raw_id.isdigit():
+        return None
     # Only load active users
-    user = User.query.get(int(user_id))
+    user = User.query.get(int(raw_id))
     if user and user.is_active:
         return user
     return None
 
+def _current_tenant():
+    return g.get('tenant') if has_app_context() else None
+
 # --- USER MODELS ---
 
 class User(db.Model, UserMixin):
@@ -26,6 +35,10 @@ class User(db.Model, UserMixin):
     role = db.Column(db.String(50), nullable=False) 
     is_active = db.Column(db.Boolean, default=True, nullable=False) 
 
+    # Change tracking for /api/sync (maintained by sync.py)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    change_seq = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+
     doctor_profile = db.relationship('Doctor', back_populates='user', uselist=False)
     patient_profile = db.relationship('Patient', back_populates='user', uselist=False)
 
@@ -35,6 +48,10 @@ class User(db.Model, UserMixin):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    def get_id(self):
+        # Scope the login (session and remember cookie) to the hospital the user belongs to
+        return f"{_current_tenant() or ''}:{self.id}"
+
     def __repr__(self):
         return f'<User {self.email}>'
 
@@ -66,6 +83,10 @@ class Doctor(db.Model):
     # This is the raw JSON text, e.g., '{"monday": "9-5", "tuesday": "1-4"}'
     availability = db.Column(db.Text, nullable=True) 
 
+    # Change tracking for /api/sync (maintained by sync.py)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    change_seq = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+
     appointments = db.relationship('Appointment', back_populates='doctor')
     
     @property
@@ -122,12 +143,16 @@ class Appointment(db.Model):
     __tablename__ = 'appointment'
     
     id = db.Column(db.Integer, primary_key=True)
-    patient_id = db.Column(db.Integer, db.ForeignKey('patient.id'), nullable=False)
+    patient_id = db.Column(db.Integer, db.ForeignKey('patient.id'), nullable=False, index=True)
     doctor_id = db.Column(db.Integer, db.ForeignKey('doctor.id'), nullable=False)
     
     appointment_date = db.Column(db.Date, nullable=False)
     appointment_time = db.Column(db.Time, nullable=False)
     status = db.Column(db.String(20), nullable=False, default='Booked') 
+
+    # Change tracking for /api/sync (maintained by sync.py)
+    updated_at = db.Column(db.DateTime, nullable=True)
+    change_seq = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
     
     patient = db.relationship('Patient', back_populates='appointments')
     doctor = db.relationship('Doctor', back_populates='appointments')
@@ -143,11 +168,161 @@ class Treatment(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     appointment_id = db.Column(db.Integer, db.ForeignKey('appointment.id'), unique=True, nullable=False)
-    diagnosis = db.Column(db.Text, nullable=False)
-    prescription = db.Column(db.Text, nullable=True)
-    notes = db.Column(db.Text, nullable=True)
+    # The full text is only loaded when accessed (or with undefer_group('text'));
+    # list views use `summary`, the first line of the diagnosis (set by history.py)
+    diagnosis = db.deferred(db.Column(db.Text, nullable=False), group='text')
+    prescription = db.deferred(db.Column(db.Text, nullable=True), group='text')
+    notes = db.deferred(db.Column(CompressedText(), nullable=True), group='text')
+    summary = db.Column(db.String(200), nullable=False, default='', server_default='')
     
     appointment = db.relationship('Appointment', back_populates='treatment')
 
     def __repr__(self):
-        return f'<Treatment for Appt {self.appointment_id}>'
\ No newline at end of file
+        return f'<Treatment for Appt {self.appointment_id}>'
+
+# --- SYNC MODELS ---
+
+class ChangeCounter(db.Model):
+    """Single-row counter handing out monotonic change sequence numbers."""
+    __tablename__ = 'change_counter'
+
+    id = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+
+# --- READ MODELS ---
+
+class DoctorDirectory(db.Model):
+    """
+    Flattened, denormalized copy of Doctor + User + Department used by the
+    directory pages and the doctors API. Kept in sync by directory.py.
+    """
+    __tablename__ = 'doctor_directory'
+
+    doctor_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=False, index=True)
+    email = db.Column(db.String(100), nullable=False)
+    department_id = db.Column(db.Integer, nullable=False, index=True)
+    department_name = db.Column(db.String(100), nullable=False, index=True)
+    is_active = db.Column(db.Boolean, nullable=False, default=True, index=True)
+
+    # Normalized availability: JSON list of [day, time] pairs for the days the
+    # doctor actually works, in weekday order.
+    availability_summary = db.Column(db.Text, nullable=False, default='[]')
+    # Bit i set => the doctor works on weekday i (Monday = 0)
+    available_days = db.Column(db.Integer, nullable=False, default=0)
+
+    @property
+    def id(self):
+        return self.doctor_id
+
+    @property
+    def availability_items(self):
+        """List of (day, time) pairs the doctor is available."""
+        return [tuple(item) for item in json.loads(self.availability_summary or '[]')]
+
+    @property
+    def next_available_date(self):
+        """The next date (from today) that falls on one of the doctor's working days."""
+        if not self.available_days:
+            return None
+        today = datetime.date.today()
+        for offset in range(7):
+            day = today + datetime.timedelta(days=offset)
+            if self.available_days & (1 << day.weekday()):
+                return day
+        return None
+
+    def __repr__(self):
+        return f'<DoctorDirectory {self.name}>'
+
+
+class PatientSummary(db.Model):
+    """
+    Per-patient digest of completed visits shown at the top of the patient
+    history page. Kept in sync by history.py whenever a treatment is saved.
+    """
+    __tablename__ = 'patient_summary'
+
+    patient_id = db.Column(db.Integer, primary_key=True)
+    visit_count = db.Column(db.Integer, nullable=False, default=0)
+    last_visit = db.Column(db.Date, nullable=True)
+    last_doctor_name = db.Column(db.String(100), nullable=True)
+
+    # JSON lists of [iso_date, doctor_name, text], newest first: diagnoses of
+    # the last few visits, prescriptions of every visit within
+    # HISTORY_ACTIVE_PRESCRIPTION_DAYS
+    recent_diagnoses = db.Column(db.Text, nullable=False, default='[]')
+    recent_prescriptions = db.Column(db.Text, nullable=False, default='[]')
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+    @staticmethod
+    def _items(raw):
+        return [(datetime.date.fromisoformat(day), doctor, text) for day, doctor, text in json.loads(raw or '[]')]
+
+    @property
+    def diagnosis_items(self):
+        """List of (date, doctor_name, diagnosis) for the most recent visits."""
+        return self._items(self.recent_diagnoses)
+
+    def active_prescriptions(self, within_days=90):
+        """Prescriptions from visits in the last `within_days` days."""
+        cutoff = datetime.date.today() - datetime.timedelta(days=within_days)
+        return [item for item in self._items(self.recent_prescriptions) if item[0] >= cutoff]
+
+    def __repr__(self):
+        return f'<PatientSummary {self.patient_id}>'
+
+
+# --- ANALYTICS MODELS ---
+
+class AppointmentRollup(db.Model):
+    """
+    Per-doctor, per-day appointment counts, maintained incrementally by
+    analytics.py so the analytics pages never scan the Appointment table.
+    """
+    __tablename__ = 'appointment_rollup'
+
+    day = db.Column(db.Date, primary_key=True)
+    doctor_id = db.Column(db.Integer, primary_key=True)
+    department_id = db.Column(db.Integer, nullable=False, index=True)
+
+    total = db.Column(db.Integer, nullable=False, default=0)  # every appointment scheduled that day
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    cancelled = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<AppointmentRollup {self.day} doctor={self.doctor_id}>'
+
+
+# --- AUDIT MODELS ---
+
+class AuditLog(db.Model):
+    """
+    Append-only record of state changes. Rows are written in batches by
+    audit.py and are never updated or deleted.
+    """
+    __tablename__ = 'audit_log'
+
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
+    actor_id = db.Column(db.Integer, nullable=True, index=True)
+    actor_email = db.Column(db.String(100), nullable=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.Integer, nullable=True)
+    action = db.Column(db.String(20), nullable=False)  # create / update / delete
+    # JSON object of {"column": [before, after]}
+    changes = db.Column(db.Text, nullable=False, default='{}')
+
+    __table_args__ = (db.Index('ix_audit_log_table_row', 'table_name', 'row_id'),)
+
+    @property
+    def changes_data(self):
+        try:
+            return json.loads(self.changes)
+        except json.JSONDecodeError:
+            return {}
+
+    def __repr__(self):
+        return f'<AuditLog {self.action} {self.table_name}:{self.row_id}>'
@@ -1,5 +1,11 @@
 from app import app, db # Import the app and database
 from models import User, Department # Import User model to create admin user
+from directory import rebuild_directory
+from analytics import backfill_rollups
+from history import rebuild_summaries
+from migrations import upgrade_schema, migrate_treatment_text
+from sync import backfill_change_seqs
+from tenancy import use_tenant
 from werkzeug.security import generate_password_hash
 import os
 
@@ -8,15 +14,17 @@ ADMIN_EMAIL = 'admin@hospital.com'
 ADMIN_PASSWORD = 'admin123'
 # --- END SETTINGS ---
 
-def create_initial_data():
-    """Creates the database tables and a default admin user."""
+def create_initial_data(tenant=None):
+    """Creates the database tables and a default admin user (optionally for one hospital)."""
     
     # SQLAlchemy needs the app context to work properly
-    with app.app_context():
+    with app.app_context(), use_tenant(tenant):
         
         print("Creating database tables...")
-        # This creates all tables defined in models.py
-        db.create_all()
+        # This creates all tables defined in models.py (on the tenant's database, if any)
+        db.metadata.create_all(bind=db.session.get_bind())
+        # Existing databases also need columns added to existing tables
+        upgrade_schema()
         print("Tables created.")
 
         # --- Create Admin User ---
@@ -57,6 +65,13 @@ def create_initial_data():
             db.session.rollback()
             print(f"Error occurred: {e}")
         
+        # Backfill the doctor directory read table for existing doctors
+        print(f"Doctor directory rebuilt with {rebuild_directory()} entries.")
+        print(f"Analytics rollups rebuilt with {backfill_rollups()} rows.")
+        print(f"Treatment text migrated for {migrate_treatment_text()} rows.")
+        print(f"Patient summaries rebuilt for {rebuild_summaries()} patients.")
+        print(f"Change tracking stamped on {backfill_change_seqs()} existing rows.")
+        
         print("Database setup complete.")
 
 # This makes the script runnable directly
@@ -0,0 +1,22 @@
+// Loads a visit's full treatment text the first time its history entry is expanded.
+(function () {
+    'use strict';
+
+    document.querySelectorAll('[data-detail-url]').forEach(function (body) {
+        var collapse = body.closest('.accordion-collapse');
+        collapse.addEventListener('show.bs.collapse', function () {
+            if (body.dataset.loaded) { return; }
+            body.dataset.loaded = '1';
+            fetch(body.dataset.detailUrl, { credentials: 'same-origin' })
+                .then(function (response) {
+                    if (!response.ok) { throw new Error(response.statusText); }
+                    return response.text();
+                })
+                .then(function (html) { body.innerHTML = html; })
+                .catch(function () {
+                    delete body.dataset.loaded;
+                    body.innerHTML = '<p class="text-danger m-0">Could not load treatment details.</p>';
+                });
+        });
+    });
+})();
@@ -0,0 +1,81 @@
+// Typeahead suggestions for inputs marked with data-typeahead-url.
+// Results come from the in-memory index behind /api/typeahead; pressing
+// Enter without picking a suggestion still submits the normal search form.
+(function () {
+    'use strict';
+
+    function debounce(fn, wait) {
+        var timer;
+        return function () {
+            var args = arguments;
+            clearTimeout(timer);
+            timer = setTimeout(function () { fn.apply(null, args); }, wait);
+        };
+    }
+
+    function attach(input) {
+        var menu = document.getElementById(input.dataset.typeaheadMenu);
+        var controller = null;
+        var active = -1;
+
+        function close() {
+            menu.innerHTML = '';
+            menu.classList.add('d-none');
+            active = -1;
+        }
+
+        function render(results) {
+            menu.innerHTML = '';
+            results.forEach(function (item) {
+                var link = document.createElement('a');
+                link.href = item.url;
+                link.className = 'list-group-item list-group-item-action d-flex justify-content-between';
+                var name = document.createElement('span');
+                name.textContent = item.type === 'doctor' ? 'Dr. ' + item.name : item.name;
+                var detail = document.createElement('small');
+                detail.className = 'text-muted';
+                detail.textContent = item.type === 'doctor' ? item.department : 'Department';
+                link.appendChild(name);
+                link.appendChild(detail);
+                menu.appendChild(link);
+            });
+            menu.classList.toggle('d-none', results.length === 0);
+            active = -1;
+        }
+
+        var lookup = debounce(function (q) {
+            if (controller) { controller.abort(); }
+            if (!q.trim()) { close(); return; }
+            controller = new AbortController();
+            fetch(input.dataset.typeaheadUrl + '?q=' + encodeURIComponent(q), {
+                signal: controller.signal,
+                headers: { 'Accept': 'application/json' },
+                credentials: 'same-origin'
+            })
+                .then(function (response) { return response.ok ? response.json() : { results: [] }; })
+                .then(function (data) { render(data.results); })
+                .catch(function () {});
+        }, 80);
+
+        input.addEventListener('input', function () { lookup(input.value); });
+        input.addEventListener('keydown', function (event) {
+            var items = menu.querySelectorAll('a');
+            if (!items.length) { return; }
+            if (event.key === 'ArrowDown' || event.key === 'ArrowUp') {
+                event.preventDefault();
+                active = (active + (event.key === 'ArrowDown' ? 1 : -1) + items.length) % items.length;
+                items.forEach(function (item, i) { item.classList.toggle('active', i === active); });
+            } else if (event.key === 'Enter' && active >= 0) {
+                event.preventDefault();
+                window.location = items[active].href;
+            } else if (event.key === 'Escape') {
+                close();
+            }
+        });
+        document.addEventListener('click', function (event) {
+            if (event.target !== input && !menu.contains(event.target)) { close(); }
+        });
+    }
+
+    document.querySelectorAll('input[data-typeahead-url]').forEach(attach);
+})();
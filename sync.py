@@ -0,0 +1,138 @@
+"""
+Change tracking for the incremental /api/sync endpoint.
+
+Every insert or update of a User, Doctor or Appointment is stamped with
+`updated_at` and a `change_seq` taken from the single-row `change_counter`
+table. The counter is bumped inside the writing transaction, so its row lock
+orders writers and a sequence number only becomes visible once every lower
+number has committed (or rolled back). Clients keep the highest sequence
+number they have seen as their sync token and ask for anything newer.
+
+Doctors and appointments are never hard-deleted (doctors are deactivated,
+appointments cancelled), so those changes arrive as ordinary updates.
+"""
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, select, update, insert, bindparam, case, or_
+from extensions import db
+from models import User, Doctor, Department, Appointment, ChangeCounter
+import datetime
+
+TRACKED_MODELS = (User, Doctor, Appointment)
+
+
+def allocate_seqs(connection, count):
+    """Reserve `count` consecutive change sequence numbers."""
+    counter = ChangeCounter.__table__
+    result = connection.execute(
+        update(counter).where(counter.c.id == 1).values(value=counter.c.value + count)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(counter).values(id=1, value=count))
+    last = connection.execute(select(counter.c.value).where(counter.c.id == 1)).scalar_one()
+    return range(last - count + 1, last + 1)
+
+
+@event.listens_for(Session, 'before_flush')
+def _stamp_changes_before_flush(session, flush_context, instances):
+    changed = [obj for obj in session.new if isinstance(obj, TRACKED_MODELS)]
+    changed += [obj for obj in session.dirty if isinstance(obj, TRACKED_MODELS)
+                and session.is_modified(obj, include_collections=False)]
+    if not changed:
+        return
+    now = datetime.datetime.now()
+    for obj, seq in zip(changed, allocate_seqs(session.connection(), len(changed))):
+        obj.change_seq = seq
+        obj.updated_at = now
+
+
+def backfill_change_seqs():
+    """Give rows that predate change tracking (change_seq = 0) a sequence number."""
+    connection = db.session.connection()
+    stamped = 0
+    for model in TRACKED_MODELS:
+        table = model.__table__
+        ids = connection.execute(
+            select(table.c.id).where(table.c.change_seq == 0).order_by(table.c.id)
+        ).scalars().all()
+        if not ids:
+            continue
+        seqs = allocate_seqs(connection, len(ids))
+        connection.execute(
+            update(table).where(table.c.id == bindparam('row_id')).values(change_seq=bindparam('seq')),
+            [{'row_id': row_id, 'seq': seq} for row_id, seq in zip(ids, seqs)],
+        )
+        stamped += len(ids)
+    db.session.commit()
+    return stamped
+
+
+# --- DELTA QUERIES ---
+
+def _changed_doctors(since, limit):
+    # A doctor's row changes when either the doctor or its user account does
+    seq = case((Doctor.change_seq > User.change_seq, Doctor.change_seq), else_=User.change_seq)
+    updated_at = case((Doctor.change_seq > User.change_seq, Doctor.updated_at), else_=User.updated_at)
+    rows = db.session.execute(
+        select(Doctor, User.name, Department.name, User.is_active, updated_at, seq)
+        .join(User, Doctor.user_id == User.id)
+        .join(Department, Doctor.department_id == Department.id)
+        .where(or_(Doctor.change_seq > since, User.change_seq > since))
+        .order_by(seq)
+        .limit(limit)
+    ).all()
+    return [(row_seq, {
+        'id': doctor.id,
+        'name': name,
+        'department': department,
+        'is_active': bool(is_active),
+        'availability': doctor.availability_data,
+        'updated_at': changed_at.isoformat() if changed_at else None,
+    }) for doctor, name, department, is_active, changed_at, row_seq in rows]
+
+
+def _changed_appointments(since, limit, user):
+    query = (
+        select(Appointment, User.name)
+        .join(Doctor, Appointment.doctor_id == Doctor.id)
+        .join(User, Doctor.user_id == User.id)
+        .where(Appointment.change_seq > since)
+        .order_by(Appointment.change_seq)
+        .limit(limit)
+    )
+    if user.role == 'patient':
+        query = query.where(Appointment.patient_id == user.patient_profile.id)
+    elif user.role == 'doctor':
+        query = query.where(Appointment.doctor_id == user.doctor_profile.id)
+
+    return [(appt.change_seq, {
+        'id': appt.id,
+        'patient_id': appt.patient_id,
+        'doctor_id': appt.doctor_id,
+        'doctor_name': doctor_name,
+        'date': appt.appointment_date.isoformat(),
+        'time': appt.appointment_time.strftime('%H:%M'),
+        'status': appt.status,
+        'updated_at': appt.updated_at.isoformat() if appt.updated_at else None,
+    }) for appt, doctor_name in db.session.execute(query).all()]
+
+
+def changes_since(since, limit, user):
+    """
+    Doctors and appointments (scoped to what `user` may see) changed after
+    sequence number `since`, at most `limit` in total, oldest first.
+    Returns (changes, next_token, has_more).
+    """
+    doctors = _changed_doctors(since, limit + 1)
+    appointments = _changed_appointments(since, limit + 1, user)
+
+    merged = sorted([(seq, 'doctors', item) for seq, item in doctors] +
+                    [(seq, 'appointments', item) for seq, item in appointments],
+                    key=lambda entry: entry[0])
+    has_more = len(merged) > limit
+    merged = merged[:limit]
+
+    changes = {'doctors': [], 'appointments': []}
+    for _, kind, item in merged:
+        changes[kind].append(item)
+    next_token = merged[-1][0] if merged else since
+    return changes, next_token, has_more
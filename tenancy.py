@@ -0,0 +1,148 @@
+"""
+Multi-hospital tenancy.
+
+Each request is resolved to a tenant (hospital) from the `X-Tenant` header or
+the request subdomain, and every query issued through `db.session` during
+that request is routed to the tenant's own database. Tenant engines are
+created lazily on first use and kept in a small LRU registry; engines that
+fall off the end of the LRU, or sit idle for too long, are disposed so one
+worker pool can serve many hospitals without holding a connection pool open
+for each of them.
+
+Tenancy is off unless `TENANTS` is configured; requests with no tenant keep
+using the default `SQLALCHEMY_DATABASE_URI`.
+"""
+from flask import g, has_app_context, current_app, request, session, abort
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+from collections import OrderedDict
+from contextlib import contextmanager
+import threading
+import time
+import re
+
+TENANT_NAME_RE = re.compile(r'^[a-z0-9][a-z0-9-]{0,62}$')
+
+
+class TenantSession(Session):
+    """Session that binds to the current tenant's engine when one is set."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            tenant = g.get('tenant')
+            if tenant is not None:
+                return current_app.extensions['tenancy'].get_engine(tenant)
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class TenantEngineRegistry:
+    """Lazily created, LRU-evicted engines keyed by tenant name."""
+
+    def __init__(self, uri_template, max_engines=32, idle_timeout=600, engine_options=None):
+        self.uri_template = uri_template
+        self.max_engines = max_engines
+        self.idle_timeout = idle_timeout
+        self.engine_options = engine_options or {}
+        self._engines = OrderedDict()  # tenant -> (engine, last_used)
+        self._lock = threading.Lock()
+
+    def get_engine(self, tenant):
+        now = time.monotonic()
+        with self._lock:
+            if tenant in self._engines:
+                engine, _ = self._engines.pop(tenant)
+            else:
+                engine = create_engine(self.uri_template.format(tenant=tenant), **self.engine_options)
+            self._engines[tenant] = (engine, now)
+            self._evict(now)
+            return engine
+
+    def evict_idle(self):
+        with self._lock:
+            self._evict(time.monotonic())
+
+    def dispose_all(self):
+        with self._lock:
+            while self._engines:
+                _, (engine, _) = self._engines.popitem(last=False)
+                engine.dispose()
+
+    def _evict(self, now):
+        # Oldest entries are at the front of the OrderedDict
+        while self._engines:
+            tenant, (engine, last_used) = next(iter(self._engines.items()))
+            if len(self._engines) <= self.max_engines and now - last_used < self.idle_timeout:
+                break
+            del self._engines[tenant]
+            engine.dispose()
+
+    def __len__(self):
+        return len(self._engines)
+
+
+def resolve_tenant():
+    """Work out the tenant for the current request, or None for the default database."""
+    tenants = current_app.config['TENANTS']
+    if not tenants:
+        return None
+
+    tenant = request.headers.get(current_app.config['TENANT_HEADER'])
+    if not tenant:
+        host = request.host.split(':')[0]
+        base = current_app.config.get('TENANT_BASE_DOMAIN')
+        if base and host.endswith('.' + base):
+            tenant = host[:-len(base) - 1].split('.')[-1]
+    if not tenant:
+        return None
+
+    tenant = tenant.strip().lower()
+    if not TENANT_NAME_RE.match(tenant) or tenant not in tenants:
+        abort(404)
+    return tenant
+
+
+@contextmanager
+def use_tenant(tenant):
+    """
+    Route `db.session` to the given tenant inside an app context (for CLI
+    commands and scripts). Enter it before the session is first used.
+    """
+    previous = g.get('tenant')
+    g.tenant = tenant
+    try:
+        yield
+    finally:
+        g.tenant = previous
+
+
+def init_tenancy(app):
+    """Create the engine registry and the per-request tenant resolver."""
+    registry = TenantEngineRegistry(
+        app.config['TENANT_DATABASE_URI_TEMPLATE'],
+        max_engines=app.config['TENANT_MAX_ENGINES'],
+        idle_timeout=app.config['TENANT_IDLE_TIMEOUT'],
+    )
+    app.extensions['tenancy'] = registry
+
+    @app.before_request
+    def bind_request_to_tenant():
+        # Static files are shared by every hospital and must stay cacheable (no session)
+        if request.endpoint in ('static', 'serve_asset'):
+            return
+        g.tenant = resolve_tenant()
+        # A login cookie from one hospital must not be replayed against another.
+        # User ids are tenant-scoped (see models.load_user); on top of that, a
+        # session carried over from another hospital is dropped and Flask-Login
+        # told to ignore (and delete) the remember cookie that came with it.
+        if session.get('_tenant') != g.tenant:
+            switched = '_tenant' in session
+            session.clear()
+            session['_tenant'] = g.tenant
+            if switched:
+                session['_remember'] = 'clear'
+
+    @app.teardown_appcontext
+    def evict_idle_tenant_engines(exc):
+        registry.evict_idle()
+
+    return registry
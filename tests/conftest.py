@@ -0,0 +1,16 @@
+"""
+Shared test setup: the app is imported once per test run, so its tenant
+configuration is set here, before any test module imports it. Every test
+database lives in a temporary directory.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DB_DIR = tempfile.mkdtemp(prefix='hms-test-')
+os.environ.setdefault('SECRET_KEY', 'test')
+os.environ['TENANTS'] = 'north,south'
+os.environ['TENANT_DATABASE_URI_TEMPLATE'] = 'sqlite:///' + os.path.join(DB_DIR, '{tenant}.db')
@@ -0,0 +1,62 @@
+"""
+The incrementally maintained appointment rollups must always match a full
+backfill of the same data.
+"""
+import datetime
+
+import pytest
+from sqlalchemy import select
+from app import app, db
+from analytics import backfill_rollups, utilization_report
+from models import User, Doctor, Patient, Department, Appointment, AppointmentRollup
+from tenancy import use_tenant
+
+DAY = datetime.date(2030, 1, 7)
+
+
+@pytest.fixture
+def rollup_db():
+    with app.app_context(), use_tenant('rollups'):
+        db.metadata.drop_all(bind=db.session.get_bind())
+        db.metadata.create_all(bind=db.session.get_bind())
+        yield db.session
+        db.session.remove()
+
+
+def _rollup_rows():
+    rollup = AppointmentRollup.__table__
+    return sorted(db.session.execute(select(rollup)).all())
+
+
+def _book(doctor, patient, hour, status='Booked'):
+    db.session.add(Appointment(patient_id=patient.id, doctor_id=doctor.id, appointment_date=DAY,
+                               appointment_time=datetime.time(hour), status=status))
+    db.session.commit()
+
+
+def test_rollups_follow_doctor_department_moves(rollup_db):
+    cardiology, neurology = Department(name='Cardiology'), Department(name='Neurology')
+    doctor = Doctor(user=User(email='doc@example.com', name='Doctor Who', role='doctor'), department=cardiology)
+    patient = Patient(user=User(email='pat@example.com', name='Pat', role='patient'))
+    for user in (doctor.user, patient.user):
+        user.set_password('password123')
+    db.session.add_all([neurology, doctor, patient])
+    db.session.commit()
+
+    _book(doctor, patient, 9)
+    doctor.department_id = neurology.id
+    db.session.commit()
+    _book(doctor, patient, 10)
+    _book(doctor, patient, 11, status='Cancelled')
+
+    report = utilization_report(DAY, DAY)
+    assert [(row['name'], row['total'], row['cancelled']) for row in report] == [('Neurology', 3, 1)]
+
+    # Moving back through the relationship re-keys the rows as well
+    doctor.department = cardiology
+    db.session.commit()
+    incremental = _rollup_rows()
+    assert {row.department_id for row in incremental} == {cardiology.id}
+
+    backfill_rollups()
+    assert _rollup_rows() == incremental
@@ -0,0 +1,32 @@
+"""
+The asset pipeline fingerprints and precompresses static files, and never
+keeps the app from starting when it cannot write its build.
+"""
+from flask import Flask, render_template_string
+from assets import init_assets, brotli
+
+
+def _app(static):
+    (static / 'css').mkdir(parents=True)
+    (static / 'css' / 'site.css').write_text('body { color: red; }\n' * 100)
+    return Flask(__name__, static_folder=str(static))
+
+
+def test_build_writes_hashed_and_compressed_files(tmp_path):
+    app = _app(tmp_path / 'static')
+    manifest = init_assets(app)
+    hashed = tmp_path / 'static' / 'dist' / manifest['css/site.css']
+    assert hashed.is_file() and hashed.with_name(hashed.name + '.gz').is_file()
+    assert hashed.with_name(hashed.name + '.br').is_file() == (brotli is not None)
+
+    with app.test_request_context():
+        assert render_template_string("{{ asset_url('css/site.css') }}") == f"/assets/{manifest['css/site.css']}"
+
+
+def test_unwritable_build_falls_back_to_static_urls(tmp_path):
+    app = _app(tmp_path / 'static')
+    (tmp_path / 'static' / 'dist').write_text('not a directory')
+
+    assert init_assets(app) == {}
+    with app.test_request_context():
+        assert render_template_string("{{ asset_url('css/site.css') }}") == '/static/css/site.css'
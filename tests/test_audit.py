@@ -0,0 +1,73 @@
+"""
+Audit entries must survive failed writes: they are retried, then spilled to
+NDJSON segment files, never silently dropped.
+"""
+import datetime
+import json
+
+from sqlalchemy import func, select
+from app import app, db
+from audit import AuditWriter
+from models import AuditLog
+from tenancy import use_tenant
+
+
+def _entries(count):
+    return [{'created_at': datetime.datetime(2030, 1, 7, 9, i), 'actor_id': None, 'actor_email': None,
+             'table_name': 'appointment', 'row_id': i, 'action': 'create', 'changes': '{}'}
+            for i in range(count)]
+
+
+def _audit_rows(tenant):
+    with app.app_context(), use_tenant(tenant):
+        rows = db.session.execute(select(func.count()).select_from(AuditLog)).scalar()
+        db.session.remove()
+        return rows
+
+
+def _create_tables(tenant, drop=False):
+    with app.app_context(), use_tenant(tenant):
+        bind = db.session.get_bind()
+        if drop:
+            db.metadata.drop_all(bind=bind)
+        else:
+            db.metadata.create_all(bind=bind)
+        db.session.remove()
+
+
+def test_failed_batch_is_retried(tmp_path):
+    _create_tables('audit-retry', drop=True)
+    writer = AuditWriter(app, max_retries=3, retry_backoff=0, spill_dir=str(tmp_path))
+    writer.add('audit-retry', _entries(3))
+
+    assert writer.flush() == 0  # no audit_log table yet
+    _create_tables('audit-retry')
+    assert writer.flush() == 3
+    assert _audit_rows('audit-retry') == 3
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_batch_is_spilled_after_max_retries(tmp_path):
+    _create_tables('audit-spill', drop=True)
+    writer = AuditWriter(app, max_retries=2, retry_backoff=0, spill_dir=str(tmp_path))
+    writer.add('audit-spill', _entries(4))
+
+    writer.flush()
+    assert writer.flush() == 0
+    assert writer.flush() == 0  # nothing left to retry
+
+    [segment] = tmp_path.iterdir()
+    lines = [json.loads(line) for line in segment.read_text().splitlines()]
+    assert [line['row_id'] for line in lines] == [0, 1, 2, 3]
+
+
+def test_backoff_delays_retries_until_shutdown(tmp_path):
+    _create_tables('audit-backoff', drop=True)
+    writer = AuditWriter(app, max_retries=5, retry_backoff=60, spill_dir=str(tmp_path))
+    writer.add('audit-backoff', _entries(2))
+
+    writer.flush()
+    _create_tables('audit-backoff')
+    assert writer.flush() == 0  # still backing off
+    writer.close()  # shutdown writes whatever it can
+    assert _audit_rows('audit-backoff') == 2
@@ -0,0 +1,50 @@
+"""
+Snapshot retention must only ever count and prune the snapshots of the
+database being backed up.
+"""
+import os
+import sqlite3
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backup import backup_database, snapshot_dir  # noqa: E402
+
+
+def _make_db(path):
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE t (x INTEGER)')
+    connection.execute('INSERT INTO t VALUES (1)')
+    connection.commit()
+    connection.close()
+    return path
+
+
+def test_retention_ignores_databases_sharing_a_name_prefix(tmp_path):
+    north = _make_db(str(tmp_path / 'north.db'))
+    north_east = _make_db(str(tmp_path / 'north-east.db'))
+    dest = str(tmp_path / 'backups')
+
+    others = [backup_database(north_east, dest, keep=5) for _ in range(2)]
+    snapshot = backup_database(north, dest, keep=1)
+
+    assert os.path.exists(snapshot)
+    assert all(os.path.exists(path) for path in others)
+
+
+def test_tenant_snapshots_are_kept_apart_from_the_default_database(tmp_path):
+    base = str(tmp_path / 'backups')
+    assert snapshot_dir(base) == base
+    assert snapshot_dir(base, 'hospital') != snapshot_dir(base)
+    assert snapshot_dir(base, 'north') != snapshot_dir(base, 'north-east')
+
+
+def test_back_to_back_snapshots_do_not_overwrite_each_other(tmp_path):
+    db_path = _make_db(str(tmp_path / 'hospital.db'))
+    dest = str(tmp_path / 'backups')
+
+    snapshots = [backup_database(db_path, dest, keep=10) for _ in range(3)]
+
+    assert len(set(snapshots)) == 3
+    assert all(os.path.exists(path) and os.path.exists(path + '.sha256') for path in snapshots)
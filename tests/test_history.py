@@ -0,0 +1,51 @@
+"""
+The patient summary shown mid-consultation must list every prescription still
+active, not only those of the last few visits.
+"""
+import datetime
+
+import pytest
+from app import app, db
+from history import RECENT_VISITS, rebuild_summaries
+from models import User, Doctor, Patient, Department, Appointment, Treatment, PatientSummary
+from tenancy import use_tenant
+
+
+@pytest.fixture
+def history_db():
+    with app.app_context(), use_tenant('history'):
+        db.metadata.drop_all(bind=db.session.get_bind())
+        db.metadata.create_all(bind=db.session.get_bind())
+        yield db.session
+        db.session.remove()
+
+
+def test_summary_keeps_every_active_prescription(history_db):
+    doctor = Doctor(user=User(email='doc@example.com', name='Doctor Who', role='doctor'),
+                    department=Department(name='Cardiology'))
+    patient = Patient(user=User(email='pat@example.com', name='Pat', role='patient'))
+    for user in (doctor.user, patient.user):
+        user.set_password('password123')
+    db.session.add_all([doctor, patient])
+    db.session.commit()
+
+    today = datetime.date.today()
+    visits = RECENT_VISITS + 3
+    for i in range(visits):
+        appointment = Appointment(patient_id=patient.id, doctor_id=doctor.id, status='Completed',
+                                  appointment_date=today - datetime.timedelta(days=7 * i),
+                                  appointment_time=datetime.time(9))
+        appointment.treatment = Treatment(diagnosis=f'Diagnosis {i}', prescription=f'Drug {i}')
+        db.session.add(appointment)
+        db.session.commit()  # one visit at a time, like the treatment form
+
+    summary = db.session.get(PatientSummary, patient.id)
+    assert len(summary.diagnosis_items) == RECENT_VISITS
+    assert [text for _, _, text in summary.active_prescriptions(90)] == [f'Drug {i}' for i in range(visits)]
+    assert len(summary.active_prescriptions(20)) == 3
+
+    incremental = (summary.recent_diagnoses, summary.recent_prescriptions)
+    rebuild_summaries()
+    db.session.expire_all()
+    summary = db.session.get(PatientSummary, patient.id)
+    assert (summary.recent_diagnoses, summary.recent_prescriptions) == incremental
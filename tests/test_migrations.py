@@ -0,0 +1,50 @@
+"""
+`flask upgrade-db` brings a database from before the read tables existed up
+to a working state in one step.
+"""
+import datetime
+
+from sqlalchemy import func, select
+from app import app, db
+from models import (User, Doctor, Patient, Department, Appointment, Treatment,
+                    DoctorDirectory, AppointmentRollup, PatientSummary)
+from tenancy import use_tenant
+
+READ_MODELS = (DoctorDirectory, AppointmentRollup, PatientSummary)
+
+
+def _count(model):
+    return db.session.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_upgrade_fills_new_read_tables():
+    with app.app_context(), use_tenant('upgrade'):
+        bind = db.session.get_bind()
+        db.metadata.drop_all(bind=bind)
+        db.metadata.create_all(bind=bind)
+        doctor = Doctor(user=User(email='doc@example.com', name='Doctor Who', role='doctor', password_hash='x'),
+                        department=Department(name='Cardiology'))
+        patient = Patient(user=User(email='pat@example.com', name='Pat', role='patient', password_hash='x'))
+        db.session.add_all([doctor, patient])
+        db.session.flush()
+        appointment = Appointment(patient_id=patient.id, doctor_id=doctor.id, status='Completed',
+                                  appointment_date=datetime.date.today(), appointment_time=datetime.time(9))
+        appointment.treatment = Treatment(diagnosis='Flu', prescription='Rest')
+        db.session.add(appointment)
+        db.session.commit()
+        # A database from before this series has none of the read tables
+        db.metadata.drop_all(bind=bind, tables=[model.__table__ for model in READ_MODELS])
+        db.session.remove()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['upgrade-db', '--tenant', 'upgrade'])
+    assert result.exit_code == 0, result.output
+    assert 'Filled empty read table patient_summary with 1 rows.' in result.output
+
+    with app.app_context(), use_tenant('upgrade'):
+        assert [_count(model) for model in READ_MODELS] == [1, 1, 1]
+        db.session.remove()
+
+    # Nothing left to fill on a second run
+    result = runner.invoke(args=['upgrade-db', '--tenant', 'upgrade'])
+    assert result.exit_code == 0 and 'Filled' not in result.output
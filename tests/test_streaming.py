@@ -0,0 +1,34 @@
+"""
+Streamed list pages fetch their rows in bounded batches and hold no database
+connection while the client downloads them.
+"""
+import pytest
+from sqlalchemy.orm import contains_eager
+from app import app, db, iter_in_batches
+from models import User, Patient
+from tenancy import use_tenant
+
+
+@pytest.fixture
+def stream_db():
+    with app.app_context(), use_tenant('stream'):
+        db.metadata.drop_all(bind=db.session.get_bind())
+        db.metadata.create_all(bind=db.session.get_bind())
+        # Duplicate names, so batches must break ties on the id
+        db.session.add_all(Patient(user=User(email=f'p{i}@example.com', name=f'Patient {i % 4}', role='patient',
+                                             password_hash='x'))
+                           for i in range(10))
+        db.session.commit()
+        yield db.session
+        db.session.remove()
+
+
+def test_batches_cover_every_row_without_holding_a_connection(stream_db):
+    query = Patient.query.join(User).options(contains_eager(Patient.user))
+    seen = []
+    for patient in iter_in_batches(query, (User.name, Patient.id), batch_size=3):
+        assert not db.session().in_transaction()
+        seen.append((patient.user.name, patient.id))
+
+    expected = [(p.user.name, p.id) for p in query.order_by(User.name, Patient.id)]
+    assert seen == expected and len(seen) == 10
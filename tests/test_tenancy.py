@@ -0,0 +1,76 @@
+"""
+Logins must stay inside the hospital they were made in: neither the session
+cookie nor the "Remember me" cookie may be replayed against another tenant.
+"""
+import pytest
+from app import app, db
+from models import User, Patient
+from tenancy import use_tenant
+
+NORTH = {'X-Tenant': 'north'}
+SOUTH = {'X-Tenant': 'south'}
+
+
+def _seed(tenant, names):
+    with app.app_context(), use_tenant(tenant):
+        db.metadata.create_all(bind=db.session.get_bind())
+        if User.query.first():
+            return
+        for i, name in enumerate(names):
+            user = User(email=f'{tenant}{i}@example.com', name=name, role='patient')
+            user.set_password('password123')
+            db.session.add(Patient(user=user))
+        db.session.commit()
+
+
+@pytest.fixture(scope='module')
+def client_factory():
+    app.config['WTF_CSRF_ENABLED'] = False
+    _seed('north', ['North One', 'North Patient'])
+    _seed('south', ['South One', 'South Victim'])
+    return app.test_client
+
+
+def _login_remembered(client):
+    response = client.post('/login', headers=NORTH, data={
+        'email': 'north1@example.com', 'password': 'password123', 'remember': 'y',
+    })
+    assert response.status_code == 302
+    cookie = client.get_cookie('remember_token')
+    assert cookie is not None
+    return cookie.value
+
+
+def test_login_works_on_own_tenant(client_factory):
+    client = client_factory()
+    _login_remembered(client)
+    response = client.get('/patient/dashboard', headers=NORTH)
+    assert response.status_code == 200
+    assert b'North Patient' in response.data
+
+
+def test_session_is_not_valid_on_other_tenant(client_factory):
+    client = client_factory()
+    _login_remembered(client)
+    response = client.get('/patient/dashboard', headers=SOUTH)
+    assert response.status_code == 302
+    assert '/login' in response.headers['Location']
+    assert b'South Victim' not in response.data
+
+
+def test_remember_cookie_replayed_on_other_tenant(client_factory):
+    token = _login_remembered(client_factory())
+
+    # Fresh browser carrying only the remember cookie from north
+    attacker = client_factory()
+    attacker.set_cookie('remember_token', token)
+    response = attacker.get('/patient/dashboard', headers=SOUTH)
+    assert response.status_code == 302
+    assert '/login' in response.headers['Location']
+
+    # The same cookie still restores the login on its own hospital
+    owner = client_factory()
+    owner.set_cookie('remember_token', token)
+    response = owner.get('/patient/dashboard', headers=NORTH)
+    assert response.status_code == 200
+    assert b'North Patient' in response.data
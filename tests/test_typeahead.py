@@ -0,0 +1,62 @@
+"""
+The typeahead index is shared by a worker's request threads: searches must
+stay consistent while refreshes change it.
+"""
+import os
+import sys
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('SECRET_KEY', 'test')
+
+from typeahead import TypeaheadIndex  # noqa: E402
+
+
+def _index(count=2000):
+    index = TypeaheadIndex()
+    index.load('department', [(1, 'Cardiology', {})])
+    index.load('doctor', [(i, f'Doctor Smith{i}', {}) for i in range(count)])
+    return index
+
+
+def test_prefix_and_multi_word_search():
+    index = _index(10)
+    assert [r['name'] for r in index.search('card')] == ['Cardiology']
+    assert [r['id'] for r in index.search('doc smith3')] == [3]
+    assert len(index.search('smith', limit=4)) == 4
+    assert index.search('  ') == []
+
+
+def test_search_during_concurrent_updates():
+    index = _index()
+    errors = []
+    stop = threading.Event()
+
+    def search():
+        try:
+            while not stop.is_set():
+                for result in index.search('smith', limit=50):
+                    assert result['name'].startswith('Doctor Smith')
+        except Exception as exc:  # surfaced in the main thread below
+            errors.append(exc)
+
+    readers = [threading.Thread(target=search) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        for round_ in range(200):
+            with index.lock:
+                for i in range(0, 2000, 7):
+                    index.remove('doctor', i)
+                for i in range(0, 2000, 7):
+                    index.put('doctor', i, f'Doctor Smith{i}')
+            if round_ % 20 == 0:
+                fresh = _index()
+                with index.lock:
+                    index.keys, index.entries = fresh.keys, fresh.entries
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+    assert errors == []
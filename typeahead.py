@@ -0,0 +1,241 @@
+"""
+In-memory typeahead index over active doctors and departments.
+
+Each worker keeps one `TypeaheadIndex` per tenant: sorted lists of
+(word, label, id) keys searched with bisect, so a prefix lookup is a binary
+search plus a short scan and never touches the database. Every word of a
+name is indexed, so "smi" finds "John Smith", and multi-word queries must
+match a prefix of some word for each query word.
+
+The index is built from the doctor directory on first use and then kept up
+to date incrementally. Commits in this worker that touch doctors, users or
+departments mark it stale; changes committed by other workers are noticed
+through the change counter (see sync.py), checked at most every
+TYPEAHEAD_REFRESH_INTERVAL seconds, and only the doctors whose change_seq
+moved are re-read.
+
+Refreshes read the database first and only then take the index lock to
+apply the changes (a full rebuild builds a new index and swaps it in), so
+concurrent searches, which also take the lock, never see a half-applied
+update and are only held up for the in-memory part.
+"""
+from flask import g, has_app_context, current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, select, or_
+from extensions import db
+from models import User, Doctor, Department, DoctorDirectory, ChangeCounter
+import unicodedata
+import threading
+import bisect
+import time
+import re
+
+WORD_RE = re.compile(r'\w+')
+KINDS = ('department', 'doctor')  # Departments are listed before doctors
+
+
+def normalize_words(text):
+    """Lower-cased, accent-stripped words of `text`."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return WORD_RE.findall(stripped.casefold())
+
+
+class TypeaheadIndex:
+    """
+    Prefix index over doctor and department names for one tenant. `search`
+    takes `lock`; callers must hold it around put/remove on a shared index.
+    """
+
+    def __init__(self):
+        self.keys = {kind: [] for kind in KINDS}  # kind -> sorted [(word, label, id)]
+        self.entries = {}  # (kind, id) -> (keys, result)
+        self.lock = threading.Lock()  # guards keys/entries
+        self.refresh_lock = threading.Lock()  # one refresh at a time
+        self.built = False
+        self.stale = True
+        self.rebuild = False
+        self.seq = 0
+        self.checked_at = 0.0
+
+    def _entry(self, kind, item_id, label, extra):
+        sort_label = label.casefold()
+        keys = [(word, sort_label, item_id) for word in sorted(set(normalize_words(label)))]
+        self.entries[(kind, item_id)] = (keys, {'type': kind, 'id': item_id, 'name': label, **extra})
+        return keys
+
+    def put(self, kind, item_id, label, **extra):
+        """Add or replace one entry."""
+        self.remove(kind, item_id)
+        for key in self._entry(kind, item_id, label, extra):
+            bisect.insort(self.keys[kind], key)
+
+    def load(self, kind, items):
+        """Bulk-add (item_id, label, extra) entries of a kind not yet in the index."""
+        keys = self.keys[kind]
+        for item_id, label, extra in items:
+            keys.extend(self._entry(kind, item_id, label, extra))
+        keys.sort()
+
+    def remove(self, kind, item_id):
+        entry = self.entries.pop((kind, item_id), None)
+        if entry is None:
+            return
+        keys = self.keys[kind]
+        for key in entry[0]:
+            i = bisect.bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                del keys[i]
+
+    def search(self, query, limit=8):
+        """Up to `limit` entries matching every word of `query` by prefix."""
+        words = normalize_words(query)
+        if not words:
+            return []
+        # Scan the range of the longest (most selective) word, filter on the rest
+        others = sorted(words, key=len)
+        scan = others.pop()
+        with self.lock:
+            return self._scan(scan, others, limit)
+
+    def _scan(self, scan, others, limit):
+        results = []
+        for kind in KINDS:
+            keys = self.keys[kind]
+            seen = set()
+            i = bisect.bisect_left(keys, (scan,))
+            while i < len(keys) and len(results) < limit and keys[i][0].startswith(scan):
+                item_id = keys[i][2]
+                i += 1
+                if item_id in seen:
+                    continue
+                seen.add(item_id)
+                entry_keys, result = self.entries[(kind, item_id)]
+                if all(any(k[0].startswith(w) for k in entry_keys) for w in others):
+                    results.append(result)
+        return results
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class TypeaheadRegistry:
+    """Per-worker map of tenant -> TypeaheadIndex."""
+
+    def __init__(self, refresh_interval=2.0):
+        self.refresh_interval = refresh_interval
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get(self, tenant):
+        with self._lock:
+            index = self._indexes.get(tenant)
+            if index is None:
+                index = self._indexes[tenant] = TypeaheadIndex()
+            return index
+
+    def mark_stale(self, tenant, rebuild=False):
+        with self._lock:
+            index = self._indexes.get(tenant)
+        if index is not None:
+            index.rebuild = index.rebuild or rebuild
+            index.stale = True
+
+
+# --- LOADING ---
+
+def _doctor_extra(row):
+    return {'department': row.department_name, 'department_id': row.department_id}
+
+
+def _departments():
+    return db.session.execute(select(Department.id, Department.name)).all()
+
+
+def _replace_departments(index, departments):
+    for kind, department_id in [key for key in index.entries if key[0] == 'department']:
+        index.remove(kind, department_id)
+    for department_id, name in departments:
+        index.put('department', department_id, name)
+
+
+def _current_seq():
+    return db.session.execute(select(ChangeCounter.value).where(ChangeCounter.id == 1)).scalar() or 0
+
+
+def refresh_index(index):
+    """Bring `index` up to date with the current tenant's database."""
+    with index.refresh_lock:
+        # Read the counter first: every change up to it is already committed
+        seq = _current_seq()
+        if index.rebuild or not index.built:
+            # Department renames change every doctor row in the department, so
+            # build a fresh index off to the side and swap it in
+            index.rebuild = False
+            fresh = TypeaheadIndex()
+            fresh.load('doctor', ((row.doctor_id, row.name, _doctor_extra(row)) for row in
+                                  DoctorDirectory.query.filter(DoctorDirectory.is_active == True)))
+            fresh.load('department', ((department_id, name, {}) for department_id, name in _departments()))
+            with index.lock:
+                index.keys, index.entries = fresh.keys, fresh.entries
+            index.built = True
+        elif index.stale or seq != index.seq:
+            changed_ids = db.session.execute(
+                select(Doctor.id).join(User, Doctor.user_id == User.id)
+                .where(or_(Doctor.change_seq > index.seq, User.change_seq > index.seq))
+            ).scalars().all()
+            rows = {row.doctor_id: row for row in
+                    DoctorDirectory.query.filter(DoctorDirectory.doctor_id.in_(changed_ids))} if changed_ids else {}
+            departments = _departments()
+            with index.lock:
+                for doctor_id in changed_ids:
+                    row = rows.get(doctor_id)
+                    if row is not None and row.is_active:
+                        index.put('doctor', row.doctor_id, row.name, **_doctor_extra(row))
+                    else:
+                        index.remove('doctor', doctor_id)
+                _replace_departments(index, departments)
+        index.seq = seq
+        index.stale = False
+        index.checked_at = time.monotonic()
+
+
+def current_index():
+    """The current tenant's index, refreshed if it is stale or due a check."""
+    registry = current_app.extensions['typeahead']
+    index = registry.get(g.get('tenant'))
+    if index.stale or index.rebuild or time.monotonic() - index.checked_at >= registry.refresh_interval:
+        refresh_index(index)
+    return index
+
+
+# --- ORM EVENTS ---
+
+@event.listens_for(Session, 'after_flush')
+def _note_typeahead_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Department):
+            session.info['typeahead_dirty'] = 'rebuild'
+        elif isinstance(obj, Doctor) or (isinstance(obj, User) and obj.role == 'doctor'):
+            session.info.setdefault('typeahead_dirty', 'refresh')
+
+
+@event.listens_for(Session, 'after_commit')
+def _mark_typeahead_stale(session):
+    dirty = session.info.pop('typeahead_dirty', None)
+    if dirty and has_app_context():
+        registry = current_app.extensions.get('typeahead')
+        if registry is not None:
+            registry.mark_stale(g.get('tenant'), rebuild=dirty == 'rebuild')
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_typeahead_changes(session):
+    session.info.pop('typeahead_dirty', None)
+
+
+def init_typeahead(app):
+    """Register the per-worker typeahead registry."""
+    registry = TypeaheadRegistry(app.config['TYPEAHEAD_REFRESH_INTERVAL'])
+    app.extensions['typeahead'] = registry
+    return registry